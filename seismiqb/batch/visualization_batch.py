@@ -1,6 +1,9 @@
 """ A mixin with batch visualizations. """
 from collections import defaultdict
+from functools import lru_cache
+
 import numpy as np
+from numba import njit
 from scipy.fft import rfftfreq, rfft
 
 from ..plotters import plot
@@ -13,16 +16,16 @@ class VisualizationMixin:
     @property
     def default_plot_components(self):
         """ Return a list of default components to plot, that are actually present in batch. """
+        present = {name for name in ['images', 'masks', 'predictions'] if hasattr(self, name)}
         components = [['images'], ['masks'], ['images', 'masks'], ['predictions'], ['images', 'predictions']]
-        components = [items for items in components if all(hasattr(self, item) for item in items)]
+        components = [items for items in components if present.issuperset(items)]
         return components
 
-    def get_layer_config(self, component, layer_index, item_index, zoom,
+    def get_layer_config(self, component, layer_index, items,
                          augment_mask, augment_prediction, data_cmap, mask_cmap, mask_color):
-        """ Retrieve requested component from batch, preprocess its data and infer its display parameters.
+        """ Preprocess requested component data and infer its display parameters.
 
-        Component data is obtained by its name and index in batch.
-        If `zoom` parameter is provided, component is sliced according to it.
+        Component data is taken from `items` by its name.
         A default colormap or a color is chosen for component display based on it category (data/mask/prediction).
 
         Component is treated as mask if it contains 'mask' in its name.
@@ -44,10 +47,8 @@ class VisualizationMixin:
             Name of component to plot.
         layer_index : int
             Index of the layer a component is displayed upon.
-        item_index : int
-            Index of batch component to retrieve.
-        zoom : tuple of two slices
-            Additional limits to show batch components in.
+        items : dict
+            Mapping from component names to their (squeezed and zoomed) items.
         augment_mask: bool
             If True, hide 0s in binary mask and automatically choose color for 1s.
             Doesn't affect component if it is on a first subplot layer.
@@ -61,10 +62,7 @@ class VisualizationMixin:
         mask_color : valid matplotib color
             Color to use for masks/predictions components display.
         """
-        data = getattr(self, component)[item_index].squeeze()
-
-        if zoom is not None:
-            data = data[zoom]
+        data = items[component]
 
         cmap = data_cmap
         mask = None
@@ -76,13 +74,15 @@ class VisualizationMixin:
                 cmap = mask_cmap
             else:
                 cmap = mask_color
-        elif 'prediction' in component and (data.min() >= 0.0 and data.max() <= 1.0):
+        elif 'prediction' in component and is_in_unit_range(data):
             if augment_prediction is False or layer_index == 0:
                 cmap = mask_cmap
                 vmin, vmax = 0, 1
             else:
+                # Hide values lower than threshold by replacing them with nans, which are displayed transparent:
+                # that is a single pass over data instead of plotter's mask evaluation and masked array creation
                 threshold = 0.5 if augment_prediction is True else augment_prediction
-                mask = f'<{threshold}'
+                data = np.where(data >= threshold, data, np.nan)
                 cmap = mask_color
                 vmin, vmax = threshold, 1
 
@@ -145,56 +145,36 @@ class VisualizationMixin:
             Color to use for masks/predictions components display.
         """
         # pylint: disable=too-many-statements
+        # Retrieve each component item only once, even if it is displayed on multiple subplots
+        items = {}
+        for component in components.flat:
+            if component not in items:
+                data = getattr(self, component)[item_index].squeeze()
+                items[component] = data[zoom] if zoom is not None else data
+
         # Make plot config layer-wise
-        layers_indices = list(map(lambda item: list(range(len(item))), components))
-        config = components.map(self.get_layer_config, layers_indices, item_index=item_index, zoom=zoom,
-                                augment_mask=augment_mask, augment_prediction=augment_prediction,
-                                data_cmap=data_cmap, mask_cmap=mask_cmap, mask_color=mask_color)
-        config = config.to_dict()
+        layer_kwargs = {'items': items, 'augment_mask': augment_mask, 'augment_prediction': augment_prediction,
+                        'data_cmap': data_cmap, 'mask_cmap': mask_cmap, 'mask_color': mask_color}
+        if len(components) == 1 and len(components[0]) == 1:
+            # Single component on a single subplot: no need in nested mapping
+            config = self.get_layer_config(components[0][0], 0, **layer_kwargs)
+            config = {key: [[value]] for key, value in config.items()}
+        else:
+            layers_indices = [list(range(len(item))) for item in components]
+            config = components.map(self.get_layer_config, layers_indices, **layer_kwargs)
+            config = config.to_dict()
 
         # Infer slide extent from its location and zoom
         location = self.locations[item_index]
-        labels = ['INLINE', 'CROSSLINE', 'DEPTH']
-        for x, y, z in [[0, 1, 2], [0, 2, 1], [1, 2, 0]]:
-            if location[z].stop - location[z].start == 1:
-                x_label = labels[x]
-                x_start, x_stop = location[x].start, location[x].stop
-
-                y_label = labels[y]
-                y_start, y_stop = location[y].start, location[y].stop
-
-                z_label = labels[z]
-                z_start =  location[z].start
-
-                if zoom is not None:
-                    x_zoom, y_zoom = zoom
-
-                    if x_zoom.start is not None:
-                        x_start = x_start + x_zoom.start
-                    if x_zoom.stop is not None:
-                        if x_zoom.stop >= 0:
-                            x_stop = x_start + x_zoom.stop
-                        else:
-                            x_stop = x_stop + zoom[0].stop + 1
-
-                    if y_zoom.start is not None:
-                        y_start = y_start + y_zoom.start
-                    if y_zoom.stop is not None:
-                        if y_zoom.stop >= 0:
-                            y_stop = y_stop + y_zoom.stop
-                        else:
-                            y_stop = y_stop + y_zoom.stop + 1
-                break
-        else:
-            raise ValueError("Data must be 2D or pseudo-3D.")
+        bounds = tuple((slc.start, slc.stop) for slc in location)
+        zoom_bounds = None if zoom is None else tuple((slc.start, slc.stop) for slc in zoom)
+        x_label, y_label, extent, location_info = infer_location_info(bounds, zoom_bounds)
 
         # Annotate x and y axes
         config['xlabel'] = x_label
         config['ylabel'] = y_label
         if 'ticks' in add_location:
-            config['extent'] = (x_start, x_stop, y_stop, y_start)
-
-        location_info = f"{z_label}={z_start}", f"{x_label} <{x_start}:{x_stop}>", f"{y_label} <{y_start}:{y_stop}>"
+            config['extent'] = extent
 
         # Construct suptitle
         if add_suptitle:
@@ -422,3 +402,78 @@ class VisualizationMixin:
             **kwargs
         }
         return plot(plot_data, mode='curve', **kwargs)
+
+
+def is_in_unit_range(array):
+    """ Check whether all array values are in [0, 1] range. """
+    if array.dtype == np.float16:
+        array = array.astype(np.float32)
+    return _is_in_unit_range(array)
+
+@njit(cache=True)
+def _is_in_unit_range(array):
+    """ Single pass over array values, which stops on the first value out of [0, 1] range (or nan). """
+    for value in array.flat:
+        if not 0.0 <= value <= 1.0:
+            return False
+    return True
+
+
+@lru_cache(maxsize=1024)
+def infer_location_info(bounds, zoom_bounds):
+    """ Infer axes labels, extent and location description of a slide.
+    Cached, because the same locations and zooms are displayed repeatedly.
+
+    Parameters
+    ----------
+    bounds : tuple of three tuples of int
+        Start and stop of a slide location along each axis.
+    zoom_bounds : tuple of two tuples or None
+        Start and stop (possibly None) of zoom along each slide axis.
+
+    Returns
+    -------
+    x_label, y_label : str
+        Names of slide axes.
+    extent : tuple of four ints
+        Absolute slide extent in `matplotlib` format.
+    location_info : tuple of three str
+        Description of slide location along each axis.
+    """
+    labels = ['INLINE', 'CROSSLINE', 'DEPTH']
+    for x, y, z in [[0, 1, 2], [0, 2, 1], [1, 2, 0]]:
+        if bounds[z][1] - bounds[z][0] == 1:
+            x_label = labels[x]
+            x_start, x_stop = bounds[x]
+
+            y_label = labels[y]
+            y_start, y_stop = bounds[y]
+
+            z_label = labels[z]
+            z_start = bounds[z][0]
+
+            if zoom_bounds is not None:
+                (x_zoom_start, x_zoom_stop), (y_zoom_start, y_zoom_stop) = zoom_bounds
+
+                if x_zoom_start is not None:
+                    x_start = x_start + x_zoom_start
+                if x_zoom_stop is not None:
+                    if x_zoom_stop >= 0:
+                        x_stop = x_start + x_zoom_stop
+                    else:
+                        x_stop = x_stop + x_zoom_stop + 1
+
+                if y_zoom_start is not None:
+                    y_start = y_start + y_zoom_start
+                if y_zoom_stop is not None:
+                    if y_zoom_stop >= 0:
+                        y_stop = y_stop + y_zoom_stop
+                    else:
+                        y_stop = y_stop + y_zoom_stop + 1
+            break
+    else:
+        raise ValueError("Data must be 2D or pseudo-3D.")
+
+    extent = (x_start, x_stop, y_stop, y_start)
+    location_info = f"{z_label}={z_start}", f"{x_label} <{x_start}:{x_stop}>", f"{y_label} <{y_start}:{y_stop}>"
+    return x_label, y_label, extent, location_info
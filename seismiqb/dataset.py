@@ -1,6 +1,7 @@
 """ Container for storing seismic data and labels. """
 #pylint: disable=too-many-lines, too-many-arguments
 from textwrap import indent
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
@@ -80,7 +81,7 @@ class SeismicDataset(Dataset):
         For example, `dataset.get_nested_iterable('labels')` would
         return an `AugmentedDict` with labels for every field.
         """
-        return AugmentedDict({idx : getattr(field, attribute) for idx, field in self.fields.items()})
+        return AugmentedDict((idx, getattr(field, attribute)) for idx, field in self.fields.items())
 
     def __getattr__(self, key):
         """ Create nested iterables for a key.
@@ -169,9 +170,10 @@ class SeismicDataset(Dataset):
             Plotter instance to use.
             Combined with `positions` parameter allows using subplots of already existing plotter.
         """
-        components = ('images', 'masks') if getattr(self, src_labels)[idx] else ('images',)
-        cube_name = self.indices[idx]
-        geometry = self.fields[cube_name].geometry
+        field = self[idx]
+        components = ('images', 'masks') if getattr(field, src_labels) else ('images',)
+        cube_name = field.short_name
+        geometry = field.geometry
         crop_shape = np.array(geometry.shape)
 
         axis = geometry.parse_axis(axis)
@@ -237,8 +239,9 @@ class SeismicDataset(Dataset):
         return plotter(data, **kwargs)
 
     # Facies
-    def evaluate_facies(self, src_horizons, src_true=None, src_pred=None, metrics='dice'):
+    def evaluate_facies(self, src_horizons, src_true=None, src_pred=None, metrics='dice', max_workers=4):
         """ Calculate facies metrics for requested labels of the dataset and return dataframe of results.
+        Fields are evaluated in multiple threads, as metrics are computed by `numpy` routines.
 
         Parameters
         ----------
@@ -250,9 +253,15 @@ class SeismicDataset(Dataset):
             Name of field attribute that contains predicted labels.
         metrics: str or list of str
             Metrics function(s) to calculate.
+        max_workers : int
+            Maximum number of threads for parallelization.
         """
-        metrics_values = self.fields.evaluate_facies(src_horizons=src_horizons, src_true=src_true,
-                                                     src_pred=src_pred, metrics=metrics)
-        result = pd.concat(metrics_values.flat)
+        def evaluate_field(field):
+            return field.evaluate_facies(src_horizons=src_horizons, src_true=src_true,
+                                         src_pred=src_pred, metrics=metrics)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            metrics_values = list(executor.map(evaluate_field, self.fields.values()))
+        result = pd.concat(metrics_values)
 
         return result
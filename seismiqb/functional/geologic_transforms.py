@@ -1,7 +1,9 @@
 """ Functions for geologic transforms. """
+from functools import lru_cache
 from warnings import warn
 
 import numpy as np
+import scipy.fft
 try:
     import cupy as cp
     CUPY_AVAILABLE = True
@@ -48,24 +50,53 @@ def hilbert(array, axis=-1):
     """ Compute the analytic signal, using the Hilbert transform. """
     xp = cp.get_array_module(array) if CUPY_AVAILABLE else np
     N = array.shape[axis]
-    fft = xp.fft.fft(array, n=N, axis=axis)
+    axis = axis % array.ndim
+    complex_input = bool(xp.iscomplexobj(array))
 
-    h = xp.zeros(N)
-    if N % 2 == 0:
-        h[0] = h[N // 2] = 1
-        h[1:N // 2] = 2
+    # On CPU, use multithreaded transforms from `scipy`
+    if xp is np:
+        fft_module, fft_kwargs = scipy.fft, {'workers': -1}
     else:
-        h[0] = 1
-        h[1:(N + 1) // 2] = 2
+        fft_module, fft_kwargs = xp.fft, {}
 
-    if array.ndim > 1:
-        ind = [xp.newaxis] * array.ndim
-        ind[axis] = slice(None)
-        h = h[tuple(ind)]
+    if complex_input:
+        fft = fft_module.fft(array, n=N, axis=axis, **fft_kwargs)
+    else:
+        # Spectrum of a real signal is symmetric: compute only its non-negative frequencies part.
+        # Inverse transform pads it with zeros for negative frequencies, as required for the analytic signal
+        fft = fft_module.rfft(array, n=N, axis=axis, **fft_kwargs)
 
-    result = xp.fft.ifft(fft * h, axis=axis)
+    device = array.device.id if xp is not np else None
+    fft *= make_hilbert_mask(N, ndim=array.ndim, axis=axis, complex_input=complex_input, xp=xp, device=device)
+    result = fft_module.ifft(fft, n=N, axis=axis, **fft_kwargs)
     return result
 
+@lru_cache(maxsize=128)
+def make_hilbert_mask(N, ndim, axis, complex_input, xp=np, device=None):
+    """ Spectrum multiplier for the analytic signal computation, shaped to broadcast along `axis`.
+    Cached, as the same shapes are processed over and over. `device` is used only as a part of the cache key.
+    The same buffer is returned for repeated calls, so numpy masks are made read-only to protect the cache.
+    """
+    #pylint: disable=unused-argument
+    if complex_input:
+        h = xp.zeros(N)
+        if N % 2 == 0:
+            h[0] = h[N // 2] = 1
+            h[1:N // 2] = 2
+        else:
+            h[0] = 1
+            h[1:(N + 1) // 2] = 2
+    else:
+        h = xp.ones(N // 2 + 1)
+        h[1:(N + 1) // 2] = 2
+
+    shape = [1] * ndim
+    shape[axis] = -1
+    h = h.reshape(shape)
+    if xp is np:
+        h.setflags(write=False)
+    return h
+
 def compute_instantaneous_amplitude(array, axis=-1, analytic=None):
     """ Compute instantaneous amplitude. """
     xp = cp.get_array_module(array) if CUPY_AVAILABLE else np
@@ -78,7 +109,9 @@ def compute_instantaneous_phase(array, continuous=False, axis=-1, analytic=None)
     xp = cp.get_array_module(array) if CUPY_AVAILABLE else np
     analytic = analytic if analytic is not None else hilbert(array, axis=axis)
 
-    phase = xp.angle(analytic) % (2 * xp.pi) - xp.pi
+    # Same as `angle % (2 * pi) - pi` for angles in (-pi, pi] range, but without the modulo pass
+    phase = xp.angle(analytic)
+    phase -= xp.copysign(xp.pi, phase)
     if continuous:
         phase = xp.abs(phase)
     return phase.astype(np.float32)
@@ -86,9 +119,40 @@ def compute_instantaneous_phase(array, continuous=False, axis=-1, analytic=None)
 def compute_instantaneous_frequency(array, axis=-1, sample_rate=1.0, analytic=None):
     """ Compute instantaneous frequency. """
     iphases = compute_instantaneous_phase(array, axis=axis, analytic=analytic)
-    frequency = np.diff(iphases, axis=axis, prepend=0) / (2 * np.pi) * sample_rate
+    return phase_to_frequency(iphases, axis=axis, sample_rate=sample_rate)
+
+def phase_to_frequency(iphases, axis=-1, sample_rate=1.0):
+    """ Compute instantaneous frequency from instantaneous phase. """
+    xp = cp.get_array_module(iphases) if CUPY_AVAILABLE else np
+    frequency = xp.diff(iphases, axis=axis, prepend=0) / (2 * xp.pi) * sample_rate
     return frequency.astype(np.float32)
 
+def compute_instantaneous_attributes(array, attributes=('amplitude', 'phase', 'frequency'), axis=-1, sample_rate=1.0):
+    """ Compute multiple instantaneous attributes, using the same analytic signal for all of them.
+
+    Parameters
+    ----------
+    attributes : sequence of str
+        Names of attributes to compute: `amplitude`, `phase` and/or `frequency`.
+
+    Returns
+    -------
+    dict
+        Mapping from requested attribute names to their values.
+    """
+    analytic = hilbert(array, axis=axis)
+    result = {}
+
+    if 'amplitude' in attributes:
+        result['amplitude'] = compute_instantaneous_amplitude(array, axis=axis, analytic=analytic)
+    if 'phase' in attributes or 'frequency' in attributes:
+        iphases = compute_instantaneous_phase(array, axis=axis, analytic=analytic)
+        if 'phase' in attributes:
+            result['phase'] = iphases
+        if 'frequency' in attributes:
+            result['frequency'] = phase_to_frequency(iphases, axis=axis, sample_rate=sample_rate)
+    return result
+
 def compute_spectral_decomposition(array, frequencies, wavelet='mexh', sample_rate=1.0, method='fft', axis=-1):
     """ Compute spectral decomposition by convolving data with wavelets at different scales. """
     import pywt #pylint: disable=import-outside-toplevel
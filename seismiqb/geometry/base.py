@@ -408,7 +408,7 @@ class Geometry(BenchmarkMixin, CacheMixin, ConversionMixin, ExportMixin, MetricM
     def lines_to_ordinals(self, array):
         """ Convert values from inline-crossline coordinate system to their ordinals.
         In the simplest case of regular grid `ordinal = (value - value_min) // value_step`.
-        In the case of irregular spacings between values, we have to manually map values to ordinals. TODO.
+        In the case of irregular spacings between values, ordinals are found by binary search in sorted unique values.
         """
         # Indexing headers
         if self.regular_structure:
@@ -417,7 +417,8 @@ class Geometry(BenchmarkMixin, CacheMixin, ConversionMixin, ExportMixin, MetricM
                 if self.increments[i] != 1:
                     array[:, i] //= self.increments[i]
         else:
-            raise NotImplementedError
+            for i in range(self.index_length):
+                array[:, i] = np.searchsorted(self.index_sorted_uniques[i], array[:, i])
 
         # Depth to units
         if array.shape[1] == self.index_length + 1:
@@ -429,7 +430,7 @@ class Geometry(BenchmarkMixin, CacheMixin, ConversionMixin, ExportMixin, MetricM
     def ordinals_to_lines(self, array):
         """ Convert ordinals to values in inline-crossline coordinate system.
         In the simplest case of regular grid `value = value_min + ordinal * value_step`.
-        In the case of irregular spacings between values, we have to manually map ordinals to values. TODO.
+        In the case of irregular spacings between values, ordinals are used to index sorted unique values.
         """
         array = array.astype(np.float32)
 
@@ -440,7 +441,8 @@ class Geometry(BenchmarkMixin, CacheMixin, ConversionMixin, ExportMixin, MetricM
                     array[:, i] *= self.increments[i]
                 array[:, i] += self.shifts[i]
         else:
-            raise NotImplementedError
+            for i in range(self.index_length):
+                array[:, i] = self.index_sorted_uniques[i][array[:, i].astype(np.int32)]
 
         # Units to depth
         if array.shape[1] == self.index_length + 1:
@@ -1,12 +1,15 @@
 """ Mixin for geometry conversions. """
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
 import h5pickle as h5py
 import hdf5plugin
 
-from batchflow import Notifier, Quantizer
+from batchflow import Notifier
+
+from ..utils import Quantizer, compute_quantiles_of_integers
 
 
 def resize_3D(array, factor):
@@ -34,10 +37,28 @@ class ConversionMixin:
         """
         return ConversionMixin.TO_PROJECTION_TRANSPOSITION[axis], ConversionMixin.FROM_PROJECTION_TRANSPOSITION[axis]
 
+    @staticmethod
+    def compute_chunk_shape(projection_shape, dtype, axis, chunk_bytes=2**20):
+        """ Compute shape of a dataset chunk of roughly `chunk_bytes` size for a given projection.
+        Each chunk lies inside one slide, so that loading a slide does not read any other data.
+        For inline and crossline projections, chunks span the entire depth and as many traces, as fit into the size.
+        For the depth projection, chunks are square blocks of the slide.
+        """
+        _, n_lines, n_samples = projection_shape
+        n_items = max(chunk_bytes // np.dtype(dtype).itemsize, 1)
+
+        if axis in [0, 1]:
+            n_samples_ = min(n_samples, n_items)
+            n_lines_ = min(n_lines, max(n_items // n_samples_, 1))
+        else:
+            side = max(int(np.sqrt(n_items)), 1)
+            n_lines_, n_samples_ = min(n_lines, side), min(n_samples, side)
+        return (1, n_lines_, n_samples_)
+
 
     # Quantization
     def compute_quantization_parameters(self, ranges=0.99, clip=True, center=False, dtype=np.int8,
-                                        n_quantile_traces=100_000, seed=42):
+                                        n_quantile_traces=100_000, seed=42, estimate_error=True):
         """ Compute parameters, needed for quantizing data to required range.
         Also evaluates quantization error by comparing subset of data with its dequantized quantized version.
         On the same subset, stats like mean, std and quantile values are computed.
@@ -55,6 +76,8 @@ class ConversionMixin:
             Size of the subset to compute quantiles.
         seed : int
             Seed for quantile traces subset selection.
+        estimate_error : bool
+            Whether to compute quantization error. If False, then `'quantization_error'` is None.
 
         Returns
         -------
@@ -72,19 +95,27 @@ class ConversionMixin:
 
         quantizer = Quantizer(ranges=ranges, clip=clip, center=center, mean=self.mean, dtype=dtype)
 
-        # Load subset of data to compute quantiles
+        # Load subset of data to compute quantiles. Sorted indices are read in one pass along the file
         alive_traces_indices = self.index_matrix[~self.dead_traces_matrix].ravel()
         indices = np.random.default_rng(seed=seed).choice(alive_traces_indices, size=n_quantile_traces)
+        indices.sort()
         data = self.load_by_indices(indices)
         quantized_data = quantizer.quantize(data)
 
         mean, std = quantized_data.mean(), quantized_data.std()
-        quantile_values = np.quantile(quantized_data, q=self.quantile_support)
+        if quantized_data.dtype.itemsize == 1:
+            quantile_values = compute_quantiles_of_integers(quantized_data, q=self.quantile_support)
+        else:
+            quantile_values = np.quantile(quantized_data, q=self.quantile_support)
         quantile_values[0], quantile_values[-1] = -127, +128
 
         # Estimate quantization error
-        dequantized_data = quantizer.dequantize(quantized_data)
-        quantization_error = np.mean(np.abs(dequantized_data - data)) / self.std
+        quantization_error = None
+        if estimate_error:
+            difference = quantizer.dequantize(quantized_data)
+            np.subtract(difference, data, out=difference)
+            np.abs(difference, out=difference)
+            quantization_error = np.mean(difference) / self.std
 
         return {
             'ranges': quantizer.ranges, 'center': quantizer.center, 'clip': clip,
@@ -101,8 +132,9 @@ class ConversionMixin:
 
     # Convert SEG-Y
     def convert_to_hdf5(self, path=None, overwrite=True, postfix=False, projections='ixd',
-                        quantize=False, quantization_parameters=None, dataset_kwargs=None, chunk_size_divisor=1,
-                        pbar='t', store_meta=True, **kwargs):
+                        quantize=False, quantization_parameters=None, dataset_kwargs=None, compression='blosc',
+                        chunks='auto', chunk_size_divisor=1, ram_budget=8*1024**3, pbar='t', store_meta=True,
+                        **kwargs):
         """ Convert SEG-Y file to a more effective storage.
 
         Parameters
@@ -127,7 +159,26 @@ class ConversionMixin:
             Whether to store meta in the same file.
         dataset_kwargs : dict, optional
             Parameters, passed directly to the dataset constructor.
-            If not provided, we use the blosc compression with `lz4hc` compressor, clevel 6 and no bit shuffle.
+            If not provided, then defined by `compression`.
+        compression : {'blosc', 'blosc2', None}
+            Default compression of datasets, used if `dataset_kwargs` are not provided.
+            If 'blosc', then `lz4hc` compressor with clevel 6 and no shuffle is used, as in previously converted files.
+            It is slow to write, but fast to read: as data is read over and over during training, it is the default.
+            If 'blosc2', then `lz4` compressor with clevel 5 is used, with byte shuffle applied to float data.
+            It writes a lot faster, but reads are up to several times slower, and quantized data is barely compressed.
+            If None, then data is not compressed: conversion is the fastest, and the file can be compressed later
+            with :meth:`repack_hdf5` of the converted geometry.
+        chunks : 'auto', tuple or None
+            Shape of dataset chunks in each projection.
+            If 'auto', then chunks of about 1MB size are used: see :meth:`compute_chunk_shape` for details.
+            If None, then each slide is a chunk, with its sizes divided by `chunk_size_divisor`.
+        chunk_size_divisor : int
+            Used only if `chunks` is None or 'auto': if it is not 1, then `chunks='auto'` is treated as None,
+            so that the divisor is applied as in previously converted files.
+        ram_budget : int
+            Memory size in bytes, available for conversion. If the cube fits into it, along with temporaries of
+            the transform and a re-ordered copy of one projection, then the data is loaded once
+            and each projection is written with one call. Otherwise, data is loaded and written slide by slide.
         kwargs : dict
             Other parameters, passed directly to the file constructor.
         """
@@ -139,26 +190,62 @@ class ConversionMixin:
         else:
             dtype, transform = np.float32, lambda array: array
 
+        # Explicitly passed divisor takes priority over automatic chunks
+        if isinstance(chunks, str) and chunks == 'auto' and chunk_size_divisor != 1:
+            chunks = None
+
         # Default path: right next to the original file with new extension
         if path is None:
             path = self.make_output_path(format='hdf5', quantize=quantize, postfix=postfix, projections=projections,
-                                         chunk_size_divisor=chunk_size_divisor)
+                                         chunks=chunks, chunk_size_divisor=chunk_size_divisor)
 
         # Dataset creation parameters
         if dataset_kwargs is None:
-            dataset_kwargs = dict(hdf5plugin.Blosc(cname='lz4hc', clevel=6, shuffle=0))
+            if compression == 'blosc2':
+                filters = hdf5plugin.Blosc2.NOFILTER if quantize else hdf5plugin.Blosc2.SHUFFLE
+                dataset_kwargs = dict(hdf5plugin.Blosc2(cname='lz4', clevel=5, filters=filters))
+            elif compression == 'blosc':
+                dataset_kwargs = dict(hdf5plugin.Blosc(cname='lz4hc', clevel=6, shuffle=0))
+            elif compression is None:
+                dataset_kwargs = {}
+            else:
+                raise ValueError(f'Unknown compression={compression}!')
 
         # Remove file, if exists
         if os.path.exists(path) and overwrite:
             os.remove(path)
 
+        # Memory-mapped loader of the source file, if any: used to hint the OS about the access pattern
+        loader = getattr(self, 'loader', None)
+
+        # Peak memory per element of the whole-cube conversion. Without quantization, it is the loaded data along
+        # with a re-ordered copy of one projection. With it, the loaded data is transformed at once: quantization
+        # may fall back to a path with an `intp` index and a boolean mask as temporaries, in addition to the result
+        itemsize = np.dtype(np.float32).itemsize
+        if quantize:
+            itemsize += np.dtype(np.intp).itemsize + np.dtype(np.bool_).itemsize + np.dtype(dtype).itemsize
+        else:
+            itemsize *= 2
+        load_cube = np.prod(self.shape) * itemsize <= ram_budget
+
         # Create file and datasets inside
         with h5py.File(path, mode='w-', **kwargs) as file:
             total = sum((letter in projections) * self.shape[idx]
                         for idx, letter in enumerate('ixd'))
+            total += load_cube * self.shape[0]
             progress_bar = Notifier(pbar, total=total, ncols=110)
             name = os.path.basename(path)
 
+            # Load the whole cube at once, if it fits into memory: loading is reported as a separate stage
+            data = None
+            if load_cube:
+                progress_bar.set_description(f'Loading data for {name}')
+                # The whole file is read front to back: hint the OS to read ahead aggressively
+                if loader is not None:
+                    loader.advise('sequential')
+                data = transform(self.load_crop([slice(0, size) for size in self.shape]))
+                progress_bar.update(self.shape[0])
+
             for p in projections:
                 # Projection parameters
                 axis = self.parse_axis(p)
@@ -167,21 +254,49 @@ class ConversionMixin:
                 projection_shape = self.shape[projection_transposition]
 
                 # Create dataset
-                dataset_kwargs_ = {'chunks': (1, *projection_shape[1:] // chunk_size_divisor),
-                                   **dataset_kwargs}
+                if isinstance(chunks, str) and chunks == 'auto':
+                    chunks_ = self.compute_chunk_shape(projection_shape, dtype=dtype, axis=axis)
+                elif chunks is None:
+                    chunks_ = (1, *projection_shape[1:] // chunk_size_divisor)
+                else:
+                    chunks_ = chunks
+                dataset_kwargs_ = {'chunks': chunks_, **dataset_kwargs}
                 projection = file.create_dataset(projection_name, shape=projection_shape, dtype=dtype,
                                                  **dataset_kwargs_)
 
-                # Write data on disk
                 progress_bar.set_description(f'Converting to {name}:{p}')
-                for idx in range(self.shape[axis]):
-                    slide = self.load_slide(idx, axis=axis)
-                    slide = transform(slide)
-                    projection[idx, :, :] = slide
-
-                    progress_bar.update()
+                if data is not None:
+                    # Write the entire projection at once
+                    projection[:] = np.ascontiguousarray(data.transpose(projection_transposition))
+                    progress_bar.update(self.shape[axis])
+                    continue
+
+                # Inline slides are stored sequentially in the source file, so the OS is hinted to read ahead.
+                # Other projections gather values across the whole file: use the default access pattern for them
+                if loader is not None:
+                    loader.advise('sequential' if axis == 0 else 'normal')
+
+                # Write data on disk: compression and write of each slide are done in a separate thread,
+                # while the next slide is loaded and transformed. At most one slide is being written at a time
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    future = None
+                    for idx in range(self.shape[axis]):
+                        slide = self.load_slide(idx, axis=axis)
+                        slide = transform(slide)
+
+                        if future is not None:
+                            future.result()
+                        future = executor.submit(projection.__setitem__, (idx, slice(None), slice(None)), slide)
+
+                        progress_bar.update()
+                    if future is not None:
+                        future.result()
             progress_bar.close()
 
+        # Restore the default access pattern for further reads
+        if loader is not None:
+            loader.advise('normal')
+
         # Save meta to the same file. If quantized, replace stats with the correct ones
         from .base import Geometry
         geometry = Geometry.new(path)
@@ -251,8 +366,10 @@ class ConversionMixin:
 
 
     def make_output_path(self, format='hdf5', quantize=False, postfix=False, projections='ixd',
-                         chunk_size_divisor=1, sgy_format=8):
-        """ Compute output path for converted file, based on conversion parameters. """
+                         chunks='auto', chunk_size_divisor=1, sgy_format=8):
+        """ Compute output path for converted file, based on conversion parameters.
+        Chunk size divisor is reflected in the name only if it is actually used for chunks of the file.
+        """
         format = format.lower()
 
         if format.startswith('q'):
@@ -262,14 +379,13 @@ class ConversionMixin:
         fmt_prefix = 'q' if quantize else ''
 
         if not isinstance(postfix, str):
-            if not postfix:
-                postfix = ''
-            else:
+            make_postfix, postfix = postfix, ''
+            if make_postfix:
                 if format == 'hdf5':
                     if len(projections) < 3:
-                        postfix = '_' + projections
-                    if chunk_size_divisor != 1:
-                        postfix = '_' + f'c{chunk_size_divisor}'
+                        postfix += '_' + projections
+                    if chunk_size_divisor != 1 and (chunks is None or (isinstance(chunks, str) and chunks == 'auto')):
+                        postfix += '_' + f'c{chunk_size_divisor}'
 
                 if format == 'sgy':
                     if quantize:
@@ -283,14 +399,19 @@ class ConversionMixin:
 
 
     def convert(self, format='qsgy', path=None, postfix=False, projections='ixd', overwrite=True,
-                quantize=False, quantization_parameters=None, dataset_kwargs=None, chunk_size_divisor=1,
-                pbar='t', store_meta=True, sgy_format=8, transform=None, chunk_size=25_000, max_workers=4, **kwargs):
+                quantize=False, quantization_parameters=None, dataset_kwargs=None, compression='blosc',
+                chunks='auto', chunk_size_divisor=1, ram_budget=8*1024**3, pbar='t', store_meta=True,
+                sgy_format=8, transform=None, chunk_size=25_000, max_workers=4, **kwargs):
         """ Convert SEG-Y file to a more effective storage.
         Automatically select the conversion format, based on `format` parameter.
         Available formats are {'hdf5', 'qhdf5', 'qsgy}.
 
         Parameters are passed to either :meth:`.convert_to_hdf5` or :meth:`.repack_sgy`:
         refer to their documentation for parameters description.
+
+        Note that `compression` of HDF5 files trades conversion speed for read speed: the default 'blosc' is slow
+        to write, but the fastest to read, which matters the most for training. 'blosc2' converts a lot faster
+        at the cost of up to several times slower reads and, for quantized data, almost no compression.
         """
         format = format.lower()
 
@@ -300,14 +421,15 @@ class ConversionMixin:
 
         if path is None:
             path = self.make_output_path(format=format, postfix=postfix, quantize=quantize, projections=projections,
-                                         chunk_size_divisor=chunk_size_divisor, sgy_format=sgy_format)
+                                         chunks=chunks, chunk_size_divisor=chunk_size_divisor, sgy_format=sgy_format)
 
         # Actual conversion
         if 'hdf5' in format:
             geometry = self.convert_to_hdf5(path=path, overwrite=overwrite, projections=projections,
                                             quantize=quantize, quantization_parameters=quantization_parameters,
-                                            dataset_kwargs=dataset_kwargs, chunk_size_divisor=chunk_size_divisor,
-                                            pbar=pbar, store_meta=store_meta)
+                                            dataset_kwargs=dataset_kwargs, compression=compression,
+                                            chunks=chunks, chunk_size_divisor=chunk_size_divisor,
+                                            ram_budget=ram_budget, pbar=pbar, store_meta=store_meta)
         elif 'sgy' in format and quantize:
             geometry = self.repack_segy(path=path, overwrite=overwrite, format=sgy_format,
                                         transform=transform, quantization_parameters=quantization_parameters,
@@ -21,8 +21,9 @@ class GeometryHDF5(Geometry):
     Refer to the documentation of the base class :class:`Geometry` for more information about attributes and parameters.
     """
     FILE_OPENER = h5py.File
+    CHUNK_CACHE_FACTOR = 16
 
-    def init(self, path, mode='r', **kwargs):
+    def init(self, path, mode='r', rdcc_nbytes=None, rdcc_nslots=10007, **kwargs):
         """ Init for HDF5 geometry. The sequence of actions:
             - open file handler
             - check available projections in the file
@@ -30,9 +31,17 @@ class GeometryHDF5(Geometry):
 
         Default mode is r to multiple opens for reading.
         If you want to allow other file opens for both read/write, provide 'r+' mode.
+
+        `rdcc_nbytes` and `rdcc_nslots` set the size of the decompressed chunks cache and the number of its slots.
+        If `rdcc_nbytes` is None, then the cache holds `CHUNK_CACHE_FACTOR` of the largest chunks in the file:
+        the default `h5py` cache of 1MB may not hold even one chunk, so neighbouring crops decompress
+        the same chunks over and over. Note that the cache is allocated for each opened dataset, so the memory
+        is multiplied by the number of projections, fields and worker processes.
         """
         # Open the file
-        self.file = self.FILE_OPENER(path, mode, swmr=True)
+        if rdcc_nbytes is None:
+            rdcc_nbytes = self.compute_chunk_cache_size(path)
+        self.file = self.FILE_OPENER(path, mode, swmr=True, rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots)
 
         # Check available projections
         self.available_axis = [axis for axis, name in self.PROJECTION_NAMES.items()
@@ -50,6 +59,19 @@ class GeometryHDF5(Geometry):
         # Parse attributes from meta / set defaults
         self.add_attributes(**kwargs)
 
+    @classmethod
+    def compute_chunk_cache_size(cls, path):
+        """ Size of the chunk cache in bytes, enough for `CHUNK_CACHE_FACTOR` of the largest chunks in the file.
+        Never smaller than the default `h5py` cache of 1MB.
+        """
+        chunk_nbytes = 0
+        with h5py.File(path, 'r', swmr=True, skip_cache=True) as file:
+            for name in cls.PROJECTION_NAMES.values():
+                if name in file and file[name].chunks is not None:
+                    projection = file[name]
+                    chunk_nbytes = max(chunk_nbytes, np.prod(projection.chunks) * projection.dtype.itemsize)
+        return int(max(cls.CHUNK_CACHE_FACTOR * chunk_nbytes, 1024**2))
+
     def add_attributes(self, **kwargs):
         """ Add attributes from the file. """
         # Innate attributes of converted geometry
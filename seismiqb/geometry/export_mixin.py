@@ -1,7 +1,7 @@
 """ Mixin to hold methods for exporting array-like data as SEG-Y files. """
 import os
-import shutil
 from concurrent.futures import ThreadPoolExecutor
+from zipfile import ZipFile, ZIP_DEFLATED
 
 import numpy as np
 import segyio
@@ -15,6 +15,13 @@ class ExportMixin:
     """ Methods for exporting arrays (or array-likes) to a SEG-Y files with given spec. """
     #pylint: disable=redefined-builtin, protected-access
 
+    # Mapping from data dtype to SEG-Y format, used for `format='auto'`
+    DTYPE_TO_SEGY_FORMAT = {
+        'f4': 5, 'f8': 6,
+        'i1': 8, 'i2': 3, 'i4': 2, 'i8': 9,
+        'u1': 16, 'u2': 11, 'u4': 10, 'u8': 12,
+    }
+
     # Specs for export
     def make_export_spec(self, array_like, origin=(0, 0, 0)):
         """ Create a description of the current geometry.
@@ -87,9 +94,10 @@ class ExportMixin:
         spec.xlines = np.arange(x_start, x_start + xline_step * array_like.shape[1], dtype=np.int32)
         spec.samples = np.arange(array_like.shape[2], dtype=np.int32)
 
-        # Additional matrices
-        spec.cdp_x_matrix = np.tile(cdp_x_shift + cdp_x_step * spec.ilines.reshape(-1, 1), array_like.shape[1])
-        spec.cdp_y_matrix = np.tile(cdp_y_shift + cdp_y_step * spec.xlines.reshape(-1, 1), array_like.shape[0]).T
+        # Additional matrices: zero-copy views, as values depend only on one of the spatial coordinates
+        spatial_shape = tuple(array_like.shape[:2])
+        spec.cdp_x_matrix = np.broadcast_to(cdp_x_shift + cdp_x_step * spec.ilines.reshape(-1, 1), spatial_shape)
+        spec.cdp_y_matrix = np.broadcast_to(cdp_y_shift + cdp_y_step * spec.xlines.reshape(1, -1), spatial_shape)
         return spec
 
     # Public APIs
@@ -142,8 +150,10 @@ class ExportMixin:
             Whether to remove the SEG-Y. Useful when combined with `zip_segy` to keep only the zipped version.
         engine : {'segyio', 'memmap'}
             Which engine for file writing to use.
-        format : int
+        format : int or 'auto'
             Target SEG-Y format. Refer to SEG-Y standard for detailed description.
+            If 'auto', then inferred from the dtype of `array_like`: for example, `int8` arrays (e.g. quantized
+            predictions) are written as 1-byte integers, which makes the file four times smaller than with `float32`.
         transform : callable, optional
             Function to transform array values before writing. Useful to change the dtype.
             Must return the same dtype, as specified by `format`.
@@ -153,11 +163,19 @@ class ExportMixin:
         #pylint: disable=import-outside-toplevel
         from .segy import GeometrySEGY
 
+        # Select the format
+        if format == 'auto':
+            dtype = np.dtype(array_like.dtype).str[1:]
+            if dtype not in ExportMixin.DTYPE_TO_SEGY_FORMAT:
+                raise ValueError(f'Cannot infer SEG-Y format for dtype `{array_like.dtype}`!')
+            format = ExportMixin.DTYPE_TO_SEGY_FORMAT[dtype]
+
         # Select the spec
         if spec is None:
             spec = ExportMixin.default_export_spec(array_like=array_like, origin=origin, format=format, **kwargs)
         if isinstance(spec, str):
-            spec = GeometrySEGY(spec)
+            # Spec requires only headers, which are loaded from meta, if it is available: skip the full stats pass
+            spec = GeometrySEGY(spec, collect_stats=False)
         if isinstance(spec, GeometrySEGY):
             spec = spec.make_export_spec(array_like=array_like, origin=origin)
 
@@ -171,9 +189,9 @@ class ExportMixin:
 
         # Finalize: optionally, compress to `zip` and remove `SEG-Y`
         if zip_segy:
-            dir_name = os.path.dirname(os.path.abspath(path))
-            file_name = os.path.basename(path)
-            shutil.make_archive(os.path.splitext(path)[0], 'zip', dir_name, file_name)
+            # Seismic amplitudes are compressed poorly anyway: use the fastest compression level
+            with ZipFile(os.path.splitext(path)[0] + '.zip', 'w', compression=ZIP_DEFLATED, compresslevel=1) as file:
+                file.write(path, arcname=os.path.basename(path))
         if remove_segy:
             os.remove(path)
 
@@ -204,27 +222,32 @@ class ExportMixin:
             basename = os.path.basename(path)
             notifier = Notifier(pbar, total=len(spec.ilines), desc=f'Writing `{basename}`')
 
-            c = 0
+            # Trace header values, shared by all traces
+            header = {
+                segyio.TraceField.TRACE_SAMPLE_COUNT: len(spec.samples),
+                segyio.TraceField.TRACE_SAMPLE_INTERVAL: int(spec.sample_interval * 1000),
+                segyio.TraceField.DelayRecordingTime: spec.delay
+            }
+
+            n_xlines = len(spec.xlines)
             for i, il in notifier(enumerate(spec.ilines)):
+                c = i * n_xlines
+
                 # Load full slice: speeds-up the case where `array_like` is HDF5 dataset
-                slide = array_like[i]
+                # Cast it to the file dtype at once, instead of trace-by-trace casts inside `segyio`
+                slide = np.asarray(array_like[i], dtype=dst_file.dtype)
+                cdp_x_values, cdp_y_values = spec.cdp_x_matrix[i], spec.cdp_y_matrix[i]
 
+                # Write trace header values: only coordinates are changed between traces
+                header[segyio.TraceField.INLINE_3D] = il
                 for x, xl in enumerate(spec.xlines):
-                    # Write trace header values
-                    dst_file.header[c].update({
-                        segyio.TraceField.INLINE_3D: il,
-                        segyio.TraceField.CROSSLINE_3D: xl,
-                        segyio.TraceField.CDP_X: spec.cdp_x_matrix[i, x],
-                        segyio.TraceField.CDP_Y: spec.cdp_y_matrix[i, x],
+                    header[segyio.TraceField.CROSSLINE_3D] = xl
+                    header[segyio.TraceField.CDP_X] = cdp_x_values[x]
+                    header[segyio.TraceField.CDP_Y] = cdp_y_values[x]
+                    dst_file.header[c + x].update(header)
 
-                        segyio.TraceField.TRACE_SAMPLE_COUNT: len(spec.samples),
-                        segyio.TraceField.TRACE_SAMPLE_INTERVAL: int(spec.sample_interval * 1000),
-                        segyio.TraceField.DelayRecordingTime: spec.delay
-                    })
-
-                    # Write trace data values
-                    dst_file.trace[c] = slide[x]
-                    c += 1
+                # Write trace data values for the whole slide
+                dst_file.trace[c : c + n_xlines] = slide
 
 
     @staticmethod
@@ -245,6 +268,7 @@ class ExportMixin:
             Symbol of big/little endianness.
         chunk_size : int
             Maximum number of full inlines to include in one chunk.
+            If `array_like` is chunked (e.g. HDF5 dataset), rounded to a multiple of its chunk size along inlines.
         max_workers : int
             Maximum number of threads for parallelization.
         pbar : bool, str
@@ -288,6 +312,11 @@ class ExportMixin:
         mmap_trace_dtype = np.dtype([*mmap_trace_headers_dtype,
                                      ('data', dst_dtype, n_samples)])
 
+        # Align chunks to the storage chunks of `array_like` (e.g. HDF5 dataset), so each of them is decompressed once
+        storage_chunks = getattr(array_like, 'chunks', None)
+        if isinstance(storage_chunks, tuple) and isinstance(storage_chunks[0], (int, np.integer)):
+            chunk_size = max(1, round(chunk_size / storage_chunks[0])) * storage_chunks[0]
+
         # Split the whole file along ilines into chunks no larger than `chunk_size`
         n_chunks, last_chunk_size = divmod(len(spec.ilines), chunk_size)
         chunk_sizes = [chunk_size] * n_chunks
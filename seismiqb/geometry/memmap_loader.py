@@ -1,5 +1,6 @@
 """ Class to load headers/traces from SEG-Y via memory mapping. """
 import os
+import mmap
 from functools import partial
 from concurrent.futures import ProcessPoolExecutor
 import dill
@@ -96,6 +97,24 @@ class MemmapLoader(SegyioLoader):
         return np.memmap(filename=self.path, mode='r', shape=self.n_traces, dtype=self.mmap_trace_dtype,
                          offset=self.file_traces_offset)["data"]
 
+    ADVICES = {'normal': 'MADV_NORMAL', 'sequential': 'MADV_SEQUENTIAL',
+               'random': 'MADV_RANDOM', 'willneed': 'MADV_WILLNEED'}
+
+    def advise(self, pattern='normal'):
+        """ Hint the OS about the upcoming access pattern to the traces data, so that it prefetches pages accordingly.
+        For example, `'sequential'` makes read-ahead more aggressive, hiding disk latency behind data processing.
+        Does nothing on platforms without `madvise` support.
+
+        Parameters
+        ----------
+        pattern : {'normal', 'sequential', 'random', 'willneed'}
+            Expected access pattern.
+        """
+        advice = getattr(mmap, self.ADVICES[pattern], None)
+        mmap_ = getattr(self.data_mmap, '_mmap', None)
+        if advice is not None and mmap_ is not None:
+            mmap_.madvise(advice)
+
 
     # Headers
     def load_headers(self, headers, chunk_size=25_000, max_workers=4, pbar=False,
@@ -197,6 +197,12 @@ class SegyioLoader:
         self.file_handler.xfd.getdepth(index, buffer.size, 1, buffer)
 
 
+    # Access hints
+    def advise(self, pattern='normal'):
+        """ Hint the OS about the upcoming access pattern to the traces data. Does nothing for `segyio` reads. """
+        _ = pattern
+
+
     # Convenience and utility methods
     def make_chunk_iterator(self, chunk_size=None, n_chunks=None, limits=None, buffer=None):
         """ Create on iterator over the entire file traces in chunks.
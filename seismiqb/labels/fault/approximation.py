@@ -152,12 +152,12 @@ def find_stick_nodes(points, fault_orientation, stick_orientation, nodes_step='a
         new_points = new_points[mask]
     return new_points
 
-@njit
+@njit(cache=True)
 def node_deviation(start, end, point):
     """ The distance (in 2D) between `point` and line from `start` to `end`. """
     return np.abs(point[0] - (point[1] - start[1]) / (end[1] - start[1]) * (end[0] - start[0]) - start[0])
 
-@njit
+@njit(cache=True)
 def remove_redundant_nodes(nodes, threshold=1.5):
     """ Remove unnecessary points from stick. """
     nodes_diff = np.ediff1d(nodes[:, 1])
@@ -4,7 +4,7 @@ import os
 import numpy as np
 import pandas as pd
 
-from .triangulation import sticks_to_simplices, triangle_rasterization
+from .triangulation import sticks_to_simplices, triangles_rasterization
 from .approximation import points_to_sticks
 from .visualization import FaultVisualizationMixin, get_fake_one_stick_fault
 from .formats import FaultSticksMixin, FaultSerializationMixin
@@ -69,6 +69,7 @@ class Fault(FaultSticksMixin, FaultSerializationMixin, FaultVisualizationMixin):
         self.stick_orientation = stick_orientation
         self.sticks_step = None
         self.stick_nodes_step = None
+        self._resticked_fault = None
 
         if isinstance(storage, str):
             source = 'file'
@@ -126,8 +127,13 @@ class Fault(FaultSticksMixin, FaultSerializationMixin, FaultVisualizationMixin):
         if self.direction is not None:
             return
         if direction is None:
-            if self.has_component('sticks') and len(self.sticks) > 0:
-                ptp = np.abs([item[:, :2].ptp(axis=0) for item in self.sticks]) # pylint: disable=invalid-sequence-index
+            # Empty sticks are skipped: they would produce out-of-order segment starts for `reduceat`
+            sticks = [item for item in self.sticks if len(item)] if self.has_component('sticks') else []
+            if len(sticks) > 0:
+                # Spatial ranges of all sticks at once: reduce concatenated nodes over stick segments
+                starts = np.cumsum([0] + [len(item) for item in sticks[:-1]])
+                nodes = np.concatenate(sticks)[:, :2]
+                ptp = np.maximum.reduceat(nodes, starts, axis=0) - np.minimum.reduceat(nodes, starts, axis=0)
                 self.direction = int((ptp == 0).sum(axis=0).argmax())
             else:
                 if self.has_component('points') and len(self.points) > 0:
@@ -147,6 +153,7 @@ class Fault(FaultSticksMixin, FaultSerializationMixin, FaultVisualizationMixin):
     def reset_storage(self, storage):
         """ Clear 'points', 'sticks', 'nodes' or 'simplices' storage. """
         setattr(self, '_' + storage, None)
+        self._resticked_fault = None
 
     @classmethod
     def load(cls, path, field, name=None, interpolate=False, **kwargs):
@@ -167,6 +174,7 @@ class Fault(FaultSticksMixin, FaultSerializationMixin, FaultVisualizationMixin):
         if transform:
             points = self.field.geometry.lines_to_cubic(points)
         self._points = points
+        self._resticked_fault = None
         self.short_name = self.name
 
     def from_file(self, path, **kwargs):
@@ -199,6 +207,7 @@ class Fault(FaultSticksMixin, FaultSerializationMixin, FaultVisualizationMixin):
             if data is not None and transform:
                 data = self.field.geometry.lines_to_cubic(data)
             setattr(self, '_' + key, data)
+        self._resticked_fault = None
 
         sticks = storage.get('sticks')
         if sticks is not None and transform:
@@ -285,10 +294,9 @@ class Fault(FaultSticksMixin, FaultSerializationMixin, FaultVisualizationMixin):
         numpy.ndarray
             Array of shape (n_points, 3)
         """
-        points = []
-        for triangle in self.simplices:
-            points.append(triangle_rasterization(self.nodes[triangle].astype('float32'), width))
-        self._points = np.concatenate(points, axis=0).astype('int32')
+        triangles = self.nodes[self.simplices.astype(np.int64)].astype('float32')
+        self._points = triangles_rasterization(triangles, width)
+        self._resticked_fault = None
 
     def points_to_sticks(self, slices=None, sticks_step=10, stick_nodes_step=10, stick_orientation=2,
                          nodes_threshold=5, move_bounds=False):
@@ -334,15 +342,19 @@ class Fault(FaultSticksMixin, FaultSerializationMixin, FaultVisualizationMixin):
         if axis is not None and axis not in (2, self.direction):
             return mask
 
+        # Check intersection before accessing points, as they can be created from triangulation on the first access.
+        # Bounds are compared as scalars, as it is cheaper than creating small arrays for each call
+        bounds = ((self.i_min, self.i_max), (self.x_min, self.x_max), (self.d_min, self.d_max))
+        for (bound_min, bound_max), location in zip(bounds, locations):
+            if bound_max < location.start or bound_min >= location.stop:
+                return mask
+
         mask_bbox = np.array([[locations[0].start, locations[0].stop],
                               [locations[1].start, locations[1].stop],
                               [locations[2].start, locations[2].stop]],
                              dtype=np.int32)
         points = self.points
 
-        if (self.bbox[:, 1] < mask_bbox[:, 0]).any() or (self.bbox[:, 0] >= mask_bbox[:, 1]).any():
-            return mask
-
         if sparse and self.has_component('sticks'):
             loc = np.unique(self.nodes[:, self.direction])
             loc = loc[np.logical_and(mask_bbox[self.direction, 0] <= loc, loc < mask_bbox[self.direction, 1])]
@@ -19,28 +19,72 @@ def dilate_coords(coords, dilate=3, axis=0, max_value=None):
         The maximum possible value for coordinates along the provided axis.
         Used for values clipping into valid range.
     """
-    dilated_coords = np.tile(coords, (dilate, 1))
+    # Each value is packed into 21 bits of an integer key: use row-wise operations for larger values
+    if len(coords) == 0 or coords.min() < 0 or coords.max() + dilate // 2 >= 2**21:
+        # Create dilated coordinates: only the values along the axis are shifted, other columns are repeated
+        dilated_coords = np.empty((dilate * len(coords), 3), dtype=coords.dtype)
+        for i in range(3):
+            if i == axis:
+                shifts = np.arange(dilate, dtype=coords.dtype) - dilate//2
+                dilated_coords[:, i] = np.add.outer(shifts, coords[:, i]).ravel()
+            else:
+                dilated_coords[:, i] = np.tile(coords[:, i], dilate)
+
+        # Clip to the valid values
+        mask = dilated_coords[:, axis] >= 0
+
+        if max_value is not None:
+            mask &= dilated_coords[:, axis] < max_value
+
+        dilated_coords = dilated_coords[mask]
+
+        # Get sorted unique values
+        dilated_coords = np.unique(dilated_coords, axis=0)
+        return dilated_coords
+
+    # Create dilated and clipped coordinates as packed keys in one pass.
+    # Order of keys is the same as the lexicographical order of rows, so 1D unique gives sorted unique coordinates
+    max_value = -1 if max_value is None else max_value
+    keys = dilate_coords_keys(coords=coords, dilate=dilate, axis=axis, max_value=max_value)
+    keys = np.unique(keys)
+
+    mask = np.uint64(2**21 - 1)
+    dilated_coords = np.empty((len(keys), 3), dtype=coords.dtype)
+    dilated_coords[:, 0] = keys >> np.uint64(42)
+    dilated_coords[:, 1] = (keys >> np.uint64(21)) & mask
+    dilated_coords[:, 2] = keys & mask
+    return dilated_coords
+
+@njit(cache=True)
+def dilate_coords_keys(coords, dilate, axis, max_value):
+    """ Dilate coordinates along the axis and pack each resulting row into one integer key with 21 bits per value.
+    Values out of [0, max_value) range along the axis are skipped; negative `max_value` disables upper clipping.
+    """
+    shifts = np.array([42, 21, 0], dtype=np.uint64)
+    keys = np.empty(dilate * len(coords), dtype=np.uint64)
+    n_keys = 0
 
-    # Create dilated coordinates
-    for i in range(dilate):
-        start_idx, end_idx = i*len(coords), (i + 1)*len(coords)
-        dilated_coords[start_idx:end_idx, axis] += i - dilate//2
+    for i in range(len(coords)):
+        # Key of the point without the value along the axis
+        base_key = np.uint64(0)
+        for j in range(3):
+            if j != axis:
+                base_key |= np.uint64(coords[i, j]) << shifts[j]
 
-    # Clip to the valid values
-    mask = dilated_coords[:, axis] >= 0
+        for j in range(dilate):
+            value = coords[i, axis] + j - dilate // 2
 
-    if max_value is not None:
-        mask &= dilated_coords[:, axis] < max_value
+            if value < 0 or (max_value >= 0 and value >= max_value):
+                continue
 
-    dilated_coords = dilated_coords[mask]
+            keys[n_keys] = base_key | (np.uint64(value) << shifts[axis])
+            n_keys += 1
 
-    # Get sorted unique values
-    dilated_coords = np.unique(dilated_coords, axis=0)
-    return dilated_coords
+    return keys[:n_keys]
 
 
 # Distance evaluation
-@njit
+@njit(cache=True)
 def bboxes_intersected(bbox_1, bbox_2, axes=(0, 1, 2)):
     """ Check bounding boxes intersection on preferred axes.
 
@@ -60,7 +104,7 @@ def bboxes_intersected(bbox_1, bbox_2, axes=(0, 1, 2)):
             return False
     return True
 
-@njit
+@njit(cache=True)
 def bboxes_adjacent(bbox_1, bbox_2, adjacency=1):
     """ Bounding boxes adjacency ranges.
 
@@ -110,7 +154,7 @@ def bboxes_embedded(bbox_1, bbox_2, margin=3):
 
     return is_embedded, swap
 
-@njit
+@njit(cache=True)
 def compute_distances(coords_1, coords_2, max_threshold=10000):
     """ Find approximate minimum and maximum distances between two arrays of coordinates.
     We assume coords to have the same length and compare only corresponding points.
@@ -126,8 +170,11 @@ def compute_distances(coords_1, coords_2, max_threshold=10000):
     min_distance = max_threshold
     max_distance = 0
 
-    for coord_1, coord_2 in zip(coords_1, coords_2):
-        distance = np.abs(coord_1 - coord_2)
+    # Iterate from both ends inwards: objects usually diverge at their extremities, so early stopping happens sooner
+    n_coords = min(len(coords_1), len(coords_2))
+    for i in range(n_coords):
+        idx = i // 2 if i % 2 == 0 else n_coords - 1 - i // 2
+        distance = np.abs(coords_1[idx] - coords_2[idx])
 
         if distance >= max_threshold:
             return -1, distance
@@ -168,17 +215,17 @@ def find_contour(coords, projection_axis):
     # Get only the main object contour: object can contain holes with their own contours
     contours, _ = cv.findContours(mask, cv.RETR_TREE, cv.CHAIN_APPROX_NONE)
 
-    # Extract unique and sorted coords
+    # Extract unique and sorted coords: unification is made on flat mask indices, as it is faster than row-wise one
     contour = contours[0].reshape(len(contours[0]), 2) # Can be non-unique
+    flat_indices = np.unique(contour[:, 1].astype(np.int64) * image_shape[1] + contour[:, 0])
+    rows, columns = np.divmod(flat_indices, image_shape[1])
 
-    contour_coords = np.zeros((len(contour), 3), np.int32)
-    contour_coords[:, 1 - projection_axis] = contour[:, 1] + origin[0]
-    contour_coords[:, 2] = contour[:, 0] + origin[1]
-
-    contour_coords = np.unique(contour_coords, axis=0) # np.unique is here for sorting and unification
+    contour_coords = np.zeros((len(flat_indices), 3), np.int32)
+    contour_coords[:, 1 - projection_axis] = rows + origin[0]
+    contour_coords[:, 2] = columns + origin[1]
     return contour_coords
 
-@njit
+@njit(cache=True)
 def restore_coords_from_projection(coords, projection_buffer, axis):
     """ Get values along `axis` for 2D projection coordinates from 3D coords.
 
@@ -204,12 +251,18 @@ def restore_coords_from_projection(coords, projection_buffer, axis):
     """
     known_axes = np.array([i for i in range(3) if i != axis])
 
-    for i, buffer_line in enumerate(projection_buffer):
-        values =  coords[(coords[:, known_axes[0]] == buffer_line[known_axes[0]]) & \
-                         (coords[:, known_axes[1]] == buffer_line[known_axes[1]]),
-                         axis]
+    # Mapping from known coordinates to the minimum value along the axis: made in one pass over `coords`
+    min_values = {}
+    for coords_line in coords:
+        key = (np.int64(coords_line[known_axes[0]]), np.int64(coords_line[known_axes[1]]))
+        value = np.int64(coords_line[axis])
 
-        projection_buffer[i, axis] = min(values) if len(values) > 0 else -1
+        if key not in min_values or min_values[key] > value:
+            min_values[key] = value
+
+    for i, buffer_line in enumerate(projection_buffer):
+        key = (np.int64(buffer_line[known_axes[0]]), np.int64(buffer_line[known_axes[1]]))
+        projection_buffer[i, axis] = min_values[key] if key in min_values else -1
 
     projection_buffer = projection_buffer[projection_buffer[:, axis] != -1]
     return projection_buffer
@@ -398,8 +398,13 @@ class FaultExtractor:
             step = min(depth_iteration_step, (overlap_depths[1]-overlap_depths[0])//3)
             step = max(step, 1)
 
-            indices_1 = np.in1d(component.coords[:, -1], np.arange(overlap_depths[0], overlap_depths[1]+1, step))
-            indices_2 = np.in1d(other_component.coords[:, -1], np.arange(overlap_depths[0], overlap_depths[1]+1, step))
+            # Select coords on each `step`-th depth of the overlap:
+            # the same as `np.in1d` with `np.arange`, but without sort
+            depths_1, depths_2 = component.coords[:, -1], other_component.coords[:, -1]
+            indices_1 = (depths_1 >= overlap_depths[0]) & (depths_1 <= overlap_depths[1]) & \
+                        ((depths_1 - overlap_depths[0]) % step == 0)
+            indices_2 = (depths_2 >= overlap_depths[0]) & (depths_2 <= overlap_depths[1]) & \
+                        ((depths_2 - overlap_depths[0]) % step == 0)
 
             coords_1 = component.coords[indices_1, self.orthogonal_direction]
             coords_2 = other_component.coords[indices_2, self.orthogonal_direction]
@@ -1113,12 +1118,16 @@ class FromComponentExtractor(FaultExtractor):
             overlap_depths = (max(component.bbox[2, 0], other_component.bbox[2, 0]),
                               min(component.bbox[2, 1], other_component.bbox[2, 1]))
 
-            # Select valid coords for distances finding
-            valid_depths = component.coords[(component.coords[:, -1] >= overlap_depths[0]) & \
-                                            (component.coords[:, -1] <= overlap_depths[1]), -1]
+            # Select valid coords for distances finding: coords on depths of the `component` inside the overlap.
+            # Depths of the `other_component` are checked by indexing the table of valid depths instead of `np.in1d`
+            depths_1, depths_2 = component.coords[:, -1], other_component.coords[:, -1]
+            indices_1 = (depths_1 >= overlap_depths[0]) & (depths_1 <= overlap_depths[1])
 
-            indices_1 = np.in1d(component.coords[:, -1], valid_depths)
-            indices_2 = np.in1d(other_component.coords[:, -1], valid_depths)
+            valid_depths = np.zeros(max(overlap_depths[1] - overlap_depths[0] + 1, 0), dtype=np.bool_)
+            valid_depths[(depths_1[indices_1] - overlap_depths[0]).astype(np.int64)] = True
+
+            indices_2 = (depths_2 >= overlap_depths[0]) & (depths_2 <= overlap_depths[1])
+            indices_2[indices_2] = valid_depths[(depths_2[indices_2] - overlap_depths[0]).astype(np.int64)]
 
             coords_1 = component.coords[indices_1, self.orthogonal_direction]
             coords_2 = other_component.coords[indices_2, self.orthogonal_direction]
@@ -252,8 +252,13 @@ class FaultSerializationMixin:
         sticks = npzfile.get('sticks')
         sticks_labels = npzfile.get('sticks_labels')
 
+        # Points can be stored with a smaller dtype: restore the default one
+        points = npzfile.get('points')
+        if points is not None and points.dtype == np.int16:
+            points = points.astype(np.int32)
+
         self.from_dict({
-            'points': npzfile.get('points'),
+            'points': points,
             'nodes': npzfile.get('nodes'),
             'simplices': npzfile.get('simplices'),
             'sticks': self._labeled_array_to_sticks(sticks, sticks_labels) if sticks is not None else None,
@@ -267,7 +272,10 @@ class FaultSerializationMixin:
     def load_npy(self, path):
         """ Load fault points from npy file. """
         points = np.load(path, allow_pickle=False)
+        if points.dtype == np.int16:
+            points = points.astype(np.int32)
         self._points = points
+        self._resticked_fault = None
 
     def dump_npz(self, path, attributes_to_create=None):
         """ Dump fault to npz. """
@@ -289,6 +297,12 @@ class FaultSerializationMixin:
             if self.has_component(item):
                 kwargs[item] = getattr(self, item)
 
+        # Store points with a twice smaller dtype, if possible: coordinates usually fit into it
+        points = kwargs.get('points')
+        if points is not None and np.issubdtype(points.dtype, np.integer) and len(points) > 0 \
+            and points.min() >= 0 and points.max() <= np.iinfo(np.int16).max:
+            kwargs['points'] = points.astype(np.int16)
+
         np.savez(path, **kwargs)
 
 
@@ -6,7 +6,7 @@ from numba.types import bool_
 from ...functional import make_gaussian_kernel
 
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def skeletonize(slide, width=5, rel_height=0.5, prominence=0.05, threshold=0.05, distance=None, mode=0, axis=1):
     """ Perform skeletonize of faults on 2D slide
 
@@ -56,7 +56,7 @@ def skeletonize(slide, width=5, rel_height=0.5, prominence=0.05, threshold=0.05,
             skeletonized_slide[i, peaks] = values
     return skeletonized_slide
 
-@njit
+@njit(cache=True)
 def find_peaks(x, width=5, prominence=0.05, rel_height=0.5, threshold=0.05, distance=None):
     """ See :meth:`scipy.signal.find_peaks`. """
     lmax = (x[1:] - x[:-1] >= 0)
@@ -77,7 +77,7 @@ def find_peaks(x, width=5, prominence=0.05, rel_height=0.5, threshold=0.05, dist
     mask = np.logical_and(widths[0] >= width, prominences >= prominence)
     return peaks[mask], prominences[mask]
 
-@njit
+@njit(cache=True)
 def _peak_prominences(x, peaks, wlen):
     prominences = np.empty(peaks.shape[0], dtype=np.float32)
     left_bases = np.empty(peaks.shape[0], dtype=np.intp)
@@ -113,7 +113,7 @@ def _peak_prominences(x, peaks, wlen):
 
     return prominences, left_bases, right_bases
 
-@njit
+@njit(cache=True)
 def _peak_widths(x, peaks, rel_height, prominences, left_bases, right_bases):
     widths = np.empty(peaks.shape[0], dtype=np.float64)
     width_heights = np.empty(peaks.shape[0], dtype=np.float64)
@@ -151,7 +151,7 @@ def _peak_widths(x, peaks, rel_height, prominences, left_bases, right_bases):
 
     return widths, width_heights, left_ips, right_ips
 
-@njit
+@njit(cache=True)
 def _select_by_peak_distance(peaks, priority, distance):
     peaks_size = peaks.shape[0]
     distance_ = np.ceil(distance)
@@ -193,7 +193,7 @@ def faults_sizes(labels):
         sizes.append((i_len ** 2 + x_len ** 2) ** 0.5)
     return np.array(sizes)
 
-@njit
+@njit(cache=True)
 def split_array(array, labels):
     """ Split (groupby) array by values from labels. Labels must be sorted and all groups must be contiguous. """
     positions = []
@@ -203,7 +203,7 @@ def split_array(array, labels):
 
     return np.split(array, positions)
 
-@njit
+@njit(cache=True)
 def thin_line(points, column=0):
     """ Make thick line. Works with sorted arrays by the axis of interest. """
     line = np.zeros_like(points)
@@ -277,7 +277,7 @@ def bilateral_filter(data, kernel_size=3, kernel=None, padding='same', sigma_spa
     return result
 
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def _bilateral_filter(src, kernel, sigma_range=0.15):
     """ Jit-accelerated function to apply 3d bilateral filtering.
 
@@ -1,10 +1,10 @@
 """ Triangulation functions. """
 import numpy as np
-from numba import njit
+from numba import njit, prange
 from scipy.spatial import Delaunay
 
 
-@njit
+@njit(cache=True)
 def triangle_rasterization(points, width=1):
     """ Transform triangle to surface of the fixed thickness.
 
@@ -20,21 +20,79 @@ def triangle_rasterization(points, width=1):
     numpy.ndarray
         array of size N x 3 where N is a number of points in rasterization.
     """
-    max_n_points = np.int32(triangle_volume(points, width))
+    max_n_points = triangle_max_n_points(points, width)
     _points = np.empty((max_n_points, 3))
+    n_points = rasterize_triangle(points, width, _points)
+    return _points[:n_points]
+
+@njit(parallel=True, cache=True)
+def triangles_rasterization(triangles, width=1):
+    """ Transform multiple triangles to surface of the fixed thickness. Triangles are processed in parallel.
+
+    Parameters
+    ----------
+    triangles : numpy.ndarray
+        array of size N x 3 x 3: each item is a triangle, each row of it is a vertex
+    width : int
+        thickness of the surface
+
+    Return
+    ------
+    numpy.ndarray
+        array of size M x 3 where M is a number of points in rasterization of all triangles.
+    """
+    # Each triangle is written into its own part of the shared buffer
+    n_triangles = len(triangles)
+    offsets = np.zeros(n_triangles + 1, dtype=np.int64)
+    for i in range(n_triangles):
+        offsets[i + 1] = offsets[i] + triangle_max_n_points(triangles[i], width)
+    buffer = np.empty((offsets[-1], 3), dtype=np.int32)
+
+    n_points = np.empty(n_triangles, dtype=np.int64)
+    for i in prange(n_triangles): # pylint: disable=not-an-iterable
+        n_points[i] = rasterize_triangle(triangles[i], width, buffer[offsets[i]:offsets[i + 1]])
+
+    # Gather actually written points
+    points = np.empty((n_points.sum(), 3), dtype=np.int32)
+    position = 0
+    for i in range(n_triangles):
+        points[position:position + n_points[i]] = buffer[offsets[i]:offsets[i] + n_points[i]]
+        position += n_points[i]
+    return points
+
+@njit(cache=True)
+def rasterize_triangle(points, width, buffer):
+    """ Write points of the triangle surface of the fixed thickness into `buffer` and return their number. """
+    node = np.empty(3, dtype=np.int64)
     i = 0
     r_margin = width - width // 2
     l_margin = width // 2
     for x in range(int(np.min(points[:, 0]))-l_margin, int(np.max(points[:, 0]))+r_margin): # pylint: disable=not-an-iterable
+        node[0] = x
         for y in range(int(np.min(points[:, 1]))-l_margin, int(np.max(points[:, 1])+r_margin)):
+            node[1] = y
             for z in range(int(np.min(points[:, 2]))-l_margin, int(np.max(points[:, 2]))+r_margin):
-                node = np.array([x, y, z])
+                node[2] = z
                 if distance_to_triangle(points, node) <= width / 2:
-                    _points[i] = node
+                    buffer[i, 0], buffer[i, 1], buffer[i, 2] = x, y, z
                     i += 1
-    return _points[:i]
+    return i
+
+@njit(cache=True)
+def triangle_max_n_points(points, width):
+    """ Upper bound for the number of points in triangle rasterization.
+    Estimated by triangle volume and limited by the volume of the bounding box, which is iterated over.
+    """
+    n_points = 1
+    for i in range(3):
+        n_points *= int(np.max(points[:, i])) - int(np.min(points[:, i])) + width + 1
+
+    volume = triangle_volume(points, width)
+    if np.isfinite(volume) and volume < n_points:
+        n_points = int(volume)
+    return n_points
 
-@njit
+@njit(cache=True)
 def triangle_volume(points, width):
     """ Compute triangle volume to estimate the number of points. """
     a = points[0] - points[1]
@@ -153,7 +211,7 @@ def filter_triangles(triangles, points, max_simplices_depth=10):
                 mask[i] = 0
     return mask
 
-@njit
+@njit(cache=True)
 def distance_to_triangle(triangle, node):
     """ Paper: https://www.geometrictools.com/Documentation/DistancePoint3Triangle3.pdf
     Realization: https://gist.github.com/joshuashaffer/99d58e4ccbd37ca5d96e """
@@ -80,11 +80,19 @@ class FaultVisualizationMixin(VisualizationMixin):
         if ((sticks_step is not None and sticks_step != self.sticks_step) or
             (stick_nodes_step is not None and stick_nodes_step != self.stick_nodes_step) or
             (stick_orientation is not None and stick_orientation != self.stick_orientation)):
-            # sticks must be recreated with new parameters from points
-
-            temporary_fault = type(self)({'points': self.points}, field=self.field, direction=self.direction)
-            temporary_fault.points_to_sticks(slices, sticks_step or 10, stick_nodes_step or 10,
-                                             stick_orientation=stick_orientation)
+            # sticks must be recreated with new parameters from points.
+            # The last re-sticked fault is cached, as re-sticking is costly and the same parameters are requested
+            # over and over. The cache is reset whenever points of the fault are changed
+            slices_key = None if slices is None else tuple((slc.start, slc.stop, slc.step) for slc in slices)
+            key = (slices_key, sticks_step, stick_nodes_step, stick_orientation)
+
+            if self._resticked_fault is not None and self._resticked_fault[0] == key:
+                temporary_fault = self._resticked_fault[1]
+            else:
+                temporary_fault = type(self)({'points': self.points}, field=self.field, direction=self.direction)
+                temporary_fault.points_to_sticks(slices, sticks_step or 10, stick_nodes_step or 10,
+                                                 stick_orientation=stick_orientation)
+                self._resticked_fault = (key, temporary_fault)
             return temporary_fault.make_triangulation(slices, sticks=sticks, **kwargs)
 
         if sticks:
@@ -6,18 +6,30 @@ from ..plotters import plot
 
 class VisualizationMixin:
     """ Visualization utilities. """
-    def load_slide(self, index, axis=0, width=3):
-        """ Create a mask at desired location along supplied axis. """
+    def load_slide(self, index, axis=0, width=3, buffer=None):
+        """ Create a mask at desired location along supplied axis.
+        If `buffer` is provided, then it is zero-filled and used for the mask, avoiding allocation: the returned mask
+        is a view of it, so the next call with the same buffer overwrites previously returned masks.
+        It must be a C-contiguous array of the slide shape, either with or without the unit axis.
+        """
         axis = self.field.geometry.parse_axis(axis)
         locations = self.field.geometry.make_slide_locations(index, axis=axis)
         shape = self.field.geometry.locations_to_shape(locations)
         width = width or max(5, min(9, shape[-1] // 100))
 
-        mask = np.zeros(shape, dtype=np.float32)
+        if buffer is None:
+            mask = np.zeros(shape, dtype=np.float32)
+        else:
+            if buffer.shape not in [tuple(shape), tuple(item for item in shape if item != 1)]:
+                raise ValueError(f'Buffer of shape {buffer.shape} does not match slide shape {tuple(shape)}!')
+            if not buffer.flags.c_contiguous:
+                raise ValueError('Buffer must be C-contiguous!')
+            mask = buffer.reshape(shape)
+            mask.fill(0)
         mask = self.add_to_mask(mask, locations=locations, width=width)
         return np.squeeze(mask)
 
-    def show_slide(self, index, width=None, axis='i', zoom=None, plotter=plot, **kwargs):
+    def show_slide(self, index, width=None, axis='i', zoom=None, buffer=None, plotter=plot, **kwargs):
         """ Show slide with horizon on it.
 
         Parameters
@@ -34,6 +46,8 @@ class VisualizationMixin:
         zoom : tuple, None or 'auto'
             Tuple of slices to apply directly to 2d images. If None, slicing is not applied.
             If 'auto', zero traces on bounds will be dropped and image will be centered on label.
+        buffer : np.ndarray, optional
+            Array to create the mask in, instead of allocating a new one: refer to :meth:`load_slide` for details.
         plotter : instance of `plot`
             Plotter instance to use.
             Combined with `positions` parameter allows using subplots of already existing plotter.
@@ -42,10 +56,9 @@ class VisualizationMixin:
         axis = self.field.geometry.parse_axis(axis)
         index = self.field.geometry.get_slide_index(index, axis=axis)
 
-        # Load seismic and mask
+        # Load seismic and mask: both are already 2D
         seismic_slide = self.field.geometry.load_slide(index=index, axis=axis)
-        mask = self.load_slide(index=index, axis=axis, width=width)
-        seismic_slide, mask = np.squeeze(seismic_slide), np.squeeze(mask)
+        mask = self.load_slide(index=index, axis=axis, width=width, buffer=buffer)
         xmin, xmax, ymin, ymax = 0, seismic_slide.shape[0], seismic_slide.shape[1], 0
 
         if zoom == 'auto':
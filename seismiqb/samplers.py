@@ -12,17 +12,29 @@ Each of the classes provides:
     - convenient visualization to explore underlying `locations` structure
 """
 import numpy as np
-from numba import njit
+from numba import njit, prange
 
 from batchflow import Sampler, ConstantSampler
 from .labels import Horizon, Fault, Well, MatchedWell
 from .field import Field, SyntheticField
 from .geometry import Geometry
-from .utils import filtering_function, insert_points_into_mask, AugmentedDict
+from .utils import filtering_function, AugmentedDict
 from .plotters import plot
 
 
 
+def make_rng(rng=None):
+    """ Create a random generator for sampling.
+    If `rng` is a generator, it is used as is. If None, then the seed is taken from the global `numpy` random state,
+    so that `np.random.seed` still governs sampling. Otherwise, `rng` is used as a seed.
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    if rng is None:
+        rng = np.random.randint(2**63, dtype=np.int64)
+    return np.random.default_rng(rng)
+
+
 class BaseSampler(Sampler):
     """ Common logic of making locations. Refer to the documentation of inherited classes for more details. """
     dim = 9 # dimensionality of sampled points: field_id and label_id, orientation, locations
@@ -43,38 +55,33 @@ class BaseSampler(Sampler):
             points = filtering_function(points, filtering_matrix)
 
         # Keep only points, that can be a starting point for a crop of given shape
-        i_mask = ((ranges[:2, 0] <= points[:, :2]).all(axis=1) &
-                  ((points[:, :2] +   crop_shape[:2]) <= ranges[:2, 1]).all(axis=1))
-        x_mask = ((ranges[:2, 0] <= points[:, :2]).all(axis=1) &
-                  ((points[:, :2] + crop_shape_t[:2]) <= ranges[:2, 1]).all(axis=1))
-        mask = i_mask | x_mask
-
-        points = points[mask]
-        i_mask = i_mask[mask]
-        x_mask = x_mask[mask]
-
-        # Keep only points, that produce crops with horizon larger than threshold; append flag
-        # TODO: Implement threshold check via filtering points with matrix obtained by
-        # convolution of horizon binary matrix and a kernel with size of crop shape
+        i_mask, x_mask = make_start_points_masks(points, ranges, crop_shape, crop_shape_t)
+
+        # Keep only points, that produce crops with horizon larger than threshold; append flag.
+        # Points, that can't start a crop of any orientation, are skipped by both branches.
+        # Both branches group points by orientation: i-oriented ones go first
         if threshold != 0.0:
             points = spatial_check_points(points, matrix, crop_shape[:2], i_mask, x_mask, n_threshold)
+            n_i_points = np.searchsorted(points[:, 3], 1)
         else:
-            _points = np.empty((i_mask.sum() + x_mask.sum(), 4), dtype=np.int32)
-            _points[:i_mask.sum(), 0:3] = points[i_mask, :]
-            _points[:i_mask.sum(), 3] = 0
+            n_i_points = np.count_nonzero(i_mask)
+            _points = np.empty((n_i_points + np.count_nonzero(x_mask), 4), dtype=np.int32)
+            _points[:n_i_points, 0:3] = points[i_mask, :]
+            _points[:n_i_points, 3] = 0
 
-            _points[i_mask.sum():, 0:3] = points[x_mask, :]
-            _points[i_mask.sum():, 3] = 1
+            _points[n_i_points:, 0:3] = points[x_mask, :]
+            _points[n_i_points:, 3] = 1
 
             points = _points
 
-        # Transform points to (orientation, i_start, x_start, d_start, i_stop, x_stop, d_stop)
+        # Transform points to (orientation, i_start, x_start, d_start, i_stop, x_stop, d_stop).
+        # Each orientation group is a contiguous block of rows, so it is shifted by its crop shape at once
         buffer = np.empty((len(points), 7), dtype=np.int32)
         buffer[:, 0] = points[:, 3]
         buffer[:, 1:4] = points[:, 0:3]
         buffer[:, 4:7] = points[:, 0:3]
-        buffer[buffer[:, 0] == 0, 4:7] += crop_shape
-        buffer[buffer[:, 0] == 1, 4:7] += crop_shape_t
+        buffer[:n_i_points, 4:7] += crop_shape
+        buffer[n_i_points:, 4:7] += crop_shape_t
 
         self.n = len(buffer)
         self.crop_shape = crop_shape
@@ -93,17 +100,26 @@ class BaseSampler(Sampler):
             - 1 where only iline-oriented crops can be sampled.
             - 2 where only xline-oriented crops can be sampled.
             - 3 where both types of crop orientations can be sampled.
+
+        Computed once for each `locations` array and returned as a read-only array.
         """
+        cached = getattr(self, '_orientation_matrix', None)
+        if cached is not None and cached[0] is self.locations:
+            return cached[1]
+
         matrix = np.zeros_like(self.matrix, dtype=np.float32)
         orientations = self.locations[:, 0].astype(np.bool_)
 
+        # Each point is present at most once for each orientation, so plain assignments are enough
         i_locations = self.locations[~orientations]
-        matrix[i_locations[:, 1], i_locations[:, 2]] += 1
+        matrix[i_locations[:, 1], i_locations[:, 2]] = 1
 
         x_locations = self.locations[orientations]
         matrix[x_locations[:, 1], x_locations[:, 2]] += 2
 
         matrix[matrix == 0] = np.nan
+        matrix.setflags(write=False)
+        self._orientation_matrix = (self.locations, matrix)
         return matrix
 
 
@@ -142,11 +158,15 @@ class GeometrySampler(BaseSampler):
         Map of points to remove from potentially generated locations.
     field_id, label_id : int
         Used as the first two columns of sampled values.
+    rng : None, int or np.random.Generator
+        Source of randomness for sampling. If not a generator, used as a seed to create one.
+        If None, then the seed is taken from the global `numpy` random state.
     """
     def __init__(self, field, crop_shape, threshold=0.05, ranges=None, filtering_matrix=None,
-                 field_id=0, label_id=0, **kwargs):
-        matrix = (1 - field.dead_traces_matrix).astype(np.float32)
-        idx = np.nonzero(matrix != 0)
+                 field_id=0, label_id=0, rng=None, **kwargs):
+        # Map of alive traces: 0/1 values fit into the smallest dtype, which makes the checks read less memory
+        matrix = (field.dead_traces_matrix == 0).view(np.uint8)
+        idx = np.nonzero(matrix)
         points = np.hstack([idx[0].reshape(-1, 1),
                             idx[1].reshape(-1, 1),
                             np.zeros((len(idx[0]), 1), dtype=np.int32)]).astype(np.int32)
@@ -163,14 +183,15 @@ class GeometrySampler(BaseSampler):
         self.matrix = matrix
         self.name = field.short_name
         self.short_name = field.short_name
+        self.rng = make_rng(rng)
         super().__init__()
 
     def sample(self, size):
         """ Get exactly `size` locations. """
-        idx = np.random.randint(self.n, size=size)
+        idx = self.rng.integers(self.n, size=size)
         sampled = self.locations[idx]
 
-        depths = np.random.randint(low=self.ranges[2, 0],
+        depths = self.rng.integers(low=self.ranges[2, 0],
                                    high=self.ranges[2, 1] - self.crop_depth,
                                    size=size, dtype=np.int32)
 
@@ -231,9 +252,12 @@ class HorizonSampler(BaseSampler):
         and the second is the min location of the horizon labelling.
     spatial_shift : False or sequence of sequences of two floats
         Same logic, as with `randomize_depth`, but applied to spatial point location (inline/crossline).
+    rng : None, int or np.random.Generator
+        Source of randomness for sampling. If not a generator, used as a seed to create one.
+        If None, then the seed is taken from the global `numpy` random state.
     """
     def __init__(self, horizon, crop_shape, threshold=0.05, ranges=None, filtering_matrix=None,
-                 randomize_depth=True, spatial_shift=False, field_id=0, label_id=0, **kwargs):
+                 randomize_depth=True, spatial_shift=False, field_id=0, label_id=0, rng=None, **kwargs):
         field = horizon.field
         matrix = horizon.full_matrix
 
@@ -251,68 +275,97 @@ class HorizonSampler(BaseSampler):
         self.name = field.short_name
         self.short_name = horizon.short_name
 
+        # Depth map for checking sampled locations: with narrower dtype, less memory is read for each location.
+        # Absent points are marked by -1, which is outside of any crop, as locations start at non-negative depths
+        if field.depth <= np.iinfo(np.int16).max:
+            self.check_matrix = np.clip(matrix, -1, None).astype(np.int16)
+        else:
+            self.check_matrix = matrix
+
         if randomize_depth:
             randomize_depth = randomize_depth if isinstance(randomize_depth, tuple) else (0.9, 0.1)
         self.randomize_depth = randomize_depth
 
         self.spatial_shift = spatial_shift
+
+        # Shift ranges are constant for the sampler: compute them once.
+        # Spatial ones are stored for each of the orientations, as crop shapes differ
+        if randomize_depth:
+            self.depth_shift_range = (-int(self.crop_depth * randomize_depth[0]),
+                                      -int(self.crop_depth * randomize_depth[1]))
+        if spatial_shift:
+            spatial_shapes = np.array([self.crop_shape[:2], self.crop_shape_t[:2]]).T
+            self.spatial_shift_ranges = []
+            for shapes, axis_shift in zip(spatial_shapes, spatial_shift):
+                low = -(shapes * axis_shift[0]).astype(np.int32)
+                high = -(shapes * axis_shift[1]).astype(np.int32)
+                self.spatial_shift_ranges.append((low, high - low))
+
+        # Limits for starts and stops of sampled locations along each axis
+        limits = np.array([field.shape[0], field.shape[1], field.depth])
+        self.start_bounds = np.stack([np.zeros(3), limits - self.crop_shape], axis=1).astype(np.int32)
+        self.stop_bounds = np.stack([self.crop_shape, limits], axis=1).astype(np.int32)
+
+        # Without randomization, sampled locations are exactly the stored ones: check all of them once
+        if self.threshold != 0.0 and not (randomize_depth or spatial_shift):
+            locations = shift_sampled_locations(self.locations, np.arange(self.n), None, None, None,
+                                                self.start_bounds, self.stop_bounds)
+            self.locations = locations[spatial_check_sampled(locations, self.check_matrix, self.n_threshold)]
+            self.n = len(self.locations)
+
+        self.rng = make_rng(rng)
+
+        # Running estimate of the proportion of sampled locations that pass the `threshold` check
+        self.acceptance_rate = 0.5
         super().__init__()
 
     def sample(self, size):
         """ Get exactly `size` locations. """
         if size == 0:
             return np.zeros((0, 9), np.int32)
-        if self.threshold == 0.0:
-            sampled = self._sample(size)
+
+        buffer = np.empty((size, 9), dtype=np.int32)
+        if self.threshold == 0.0 or not (self.randomize_depth or self.spatial_shift):
+            buffer[:, 2:] = self._sample(size)
         else:
+            # Accepted locations are written directly to the output buffer
             accumulated = 0
-            sampled_list = []
 
             while accumulated < size:
-                sampled = self._sample(size*2)
-                condition = spatial_check_sampled(sampled, self.matrix, self.n_threshold)
-
-                sampled_list.append(sampled[condition])
-                accumulated += condition.sum()
-            sampled = np.concatenate(sampled_list)[:size]
+                # Oversample, based on the observed acceptance rate, so that one iteration is usually enough
+                n_try = int((size - accumulated) / max(self.acceptance_rate, 0.05) * 1.2) + 1
+                sampled = self._sample(n_try)
+                condition = spatial_check_sampled(sampled, self.check_matrix, self.n_threshold)
+
+                accepted = sampled[condition]
+                n_accepted = len(accepted)
+                n_used = min(n_accepted, size - accumulated)
+                buffer[accumulated:accumulated + n_used, 2:] = accepted[:n_used]
+                accumulated += n_used
+                self.acceptance_rate = 0.5 * self.acceptance_rate + 0.5 * n_accepted / n_try
 
-        buffer = np.empty((size, 9), dtype=np.int32)
         buffer[:, 0] = self.field_id
         buffer[:, 1] = self.label_id
-        buffer[:, 2:] = sampled
         return buffer
 
     def _sample(self, size):
-        idx = np.random.randint(self.n, size=size)
-        sampled = self.locations[idx] # (orientation, i_start, x_start, d_start, i_stop, x_stop, d_stop)
+        idx = self.rng.integers(self.n, size=size)
 
+        depth_shift, i_shift, x_shift = None, None, None
         if self.randomize_depth:
-            shift = np.random.randint(low=-int(self.crop_depth*self.randomize_depth[0]),
-                                      high=-int(self.crop_depth*self.randomize_depth[1]),
-                                      size=(size, 1), dtype=np.int32)
-            sampled[:, [3, 6]] += shift
+            depth_shift = self.rng.integers(*self.depth_shift_range, size=size, dtype=np.int32)
 
         if self.spatial_shift:
-            shapes_i = sampled[:, 4] - sampled[:, 1]
-            shift_i = np.random.randint(low=-(shapes_i*self.spatial_shift[0][0]).astype(np.int32),
-                                        high=-(shapes_i*self.spatial_shift[0][1]).astype(np.int32),
-                                        size=(size, 1), dtype=np.int32)
-            sampled[:, [1, 4]] += shift_i
-
-            shapes_x = sampled[:, 5] - sampled[:, 2]
-            shift_x = np.random.randint(low=-(shapes_x*self.spatial_shift[1][0]).astype(np.int32),
-                                        high=-(shapes_x*self.spatial_shift[1][1]).astype(np.int32),
-                                        size=(size, 1), dtype=np.int32)
-            sampled[:, [2, 5]] += shift_x
-
-            np.clip(sampled[:, 1], 0, self.field.shape[0] - self.crop_shape[0], out=sampled[:, 1])
-            np.clip(sampled[:, 4], 0 + self.crop_shape[0], self.field.shape[0], out=sampled[:, 4])
-
-            np.clip(sampled[:, 2], 0, self.field.shape[1] - self.crop_shape[1], out=sampled[:, 2])
-            np.clip(sampled[:, 5], 0 + self.crop_shape[1], self.field.shape[1], out=sampled[:, 5])
-
-        np.clip(sampled[:, 3], 0, self.field.depth - self.crop_depth, out=sampled[:, 3])
-        np.clip(sampled[:, 6], 0 + self.crop_depth, self.field.depth, out=sampled[:, 6])
+            # Ranges differ for each location: scale uniform values instead of drawing bounded integers row by row
+            orientations = self.locations[idx, 0]
+            (i_low, i_width), (x_low, x_width) = self.spatial_shift_ranges
+            uniform = self.rng.random((2, size))
+            i_shift = i_low[orientations] + (uniform[0] * i_width[orientations]).astype(np.int32)
+            x_shift = x_low[orientations] + (uniform[1] * x_width[orientations]).astype(np.int32)
+
+        # (orientation, i_start, x_start, d_start, i_stop, x_stop, d_stop)
+        sampled = shift_sampled_locations(self.locations, idx, depth_shift, i_shift, x_shift,
+                                          self.start_bounds, self.stop_bounds)
         return sampled
 
 
@@ -362,13 +415,19 @@ class FaultSampler(BaseSampler):
         Create locations in non-labeled slides between labeled slides.
     transpose : bool
         Create transposed crop locations or not.
+    rng : None, int or np.random.Generator
+        Source of randomness for sampling. If not a generator, used as a seed to create one.
+        If None, then the seed is taken from the global `numpy` random state.
     """
     def __init__(self, fault, crop_shape, threshold=0, ranges=None, extend=True, transpose=False,
-                 field_id=0, label_id=0, **kwargs):
+                 field_id=0, label_id=0, rng=None, **kwargs):
         field = fault.field
 
         self.fault = fault
-        self.points = fault.points
+
+        # Points are sorted by inlines once, so that each check of sampled locations looks only at the relevant ones
+        points = fault.points
+        self.points = np.ascontiguousarray(points[np.argsort(points[:, 0], kind='stable')])
 
         self.direction = fault.direction
         self.transpose = transpose
@@ -383,23 +442,44 @@ class FaultSampler(BaseSampler):
         self.field = field
         self.name = field.short_name
         self.short_name = fault.short_name
+        self.rng = make_rng(rng)
         super().__init__(self)
 
     @property
     def interpolated_nodes(self):
-        """ Create locations in non-labeled slides between labeled slides. """
-        slides = np.unique(self.fault.nodes[:, self.direction])
+        """ Create locations in non-labeled slides between labeled slides.
+        Nodes of each labeled slide are copied to all the slides from the previous labeled one (inclusive)
+        to the next one (exclusive). All of the copies are made at once by computing indices of source nodes.
+        """
+        nodes = self.fault.nodes
+        slides, slide_indices = np.unique(nodes[:, self.direction], return_inverse=True)
         if len(slides) == 1:
-            return self.fault.nodes
-        locations = []
-        for i, slide in enumerate(slides):
-            left = slides[max(i-1, 0)]
-            right = slides[min(i+1, len(slides)-1)]
-            chunk = self.fault.nodes[self.fault.nodes[:, self.direction] == slide]
-            for j in range(left, right):
-                chunk[:, self.direction] = j
-                locations += [chunk.copy()]
-        return np.concatenate(locations, axis=0)
+            return nodes
+
+        # Group nodes by slide, keeping their order inside each slide
+        nodes = nodes[np.argsort(slide_indices, kind='stable')]
+        n_nodes = np.bincount(slide_indices, minlength=len(slides))
+        nodes_starts = np.cumsum(n_nodes) - n_nodes
+
+        # Range of slides to copy nodes of each labeled slide to
+        positions = np.arange(len(slides))
+        left = slides[np.maximum(positions - 1, 0)]
+        right = slides[np.minimum(positions + 1, len(slides) - 1)]
+        n_copies = right - left
+
+        # For each copy: labeled slide to copy from and slide to copy to
+        copy_sources = np.repeat(positions, n_copies)
+        copy_starts = np.cumsum(n_copies) - n_copies
+        copy_slides = left[copy_sources] + np.arange(len(copy_sources)) - copy_starts[copy_sources]
+
+        # For each resulting node: copy, to which it belongs, and index of its source node
+        copy_sizes = n_nodes[copy_sources]
+        node_copies = np.repeat(np.arange(len(copy_sources)), copy_sizes)
+        node_offsets = np.arange(len(node_copies)) - (np.cumsum(copy_sizes) - copy_sizes)[node_copies]
+
+        locations = nodes[nodes_starts[copy_sources[node_copies]] + node_offsets]
+        locations[:, self.direction] = copy_slides[node_copies]
+        return locations
 
     def _make_locations(self, field, crop_shape, ranges, threshold, extend):
         # Parse parameters
@@ -418,10 +498,7 @@ class FaultSampler(BaseSampler):
             nodes = self.fault.points
 
         # Keep only points, that can be a starting point for a crop of given shape
-        i_mask = ((ranges[:2, 0] <= nodes[:, :2]).all(axis=1) &
-                  ((nodes[:, :2] + crop_shape[:2]) <= ranges[:2, 1]).all(axis=1))
-        x_mask = ((ranges[:2, 0] <= nodes[:, :2]).all(axis=1) &
-                  ((nodes[:, :2] + crop_shape_t[:2]) <= ranges[:2, 1]).all(axis=1))
+        i_mask, x_mask = make_start_points_masks(nodes, ranges, crop_shape, crop_shape_t)
         nodes = nodes[i_mask | x_mask]
 
         # Transform points to (orientation, i_start, x_start, d_start, i_stop, x_stop, d_stop)
@@ -449,43 +526,48 @@ class FaultSampler(BaseSampler):
         """ Get exactly `size` locations. """
         if size == 0:
             return np.zeros((0, 9), np.int32)
+
+        # Accepted locations are written directly to the output buffer
+        buffer = np.empty((size, 9), dtype=np.int32)
         accumulated = 0
-        sampled_list = []
 
         while accumulated < size:
             sampled = self._sample(size*4)
             condition = volumetric_check_sampled(sampled, self.points, self.crop_shape,
                                                  self.crop_shape_t, self.n_threshold)
 
-            sampled_list.append(sampled[condition])
-            accumulated += condition.sum()
-        sampled = np.concatenate(sampled_list)[:size]
+            accepted = sampled[condition]
+            n_used = min(len(accepted), size - accumulated)
+            buffer[accumulated:accumulated + n_used, 2:] = accepted[:n_used]
+            accumulated += n_used
 
-        buffer = np.empty((size, 9), dtype=np.int32)
         buffer[:, 0] = self.field_id
         buffer[:, 1] = self.label_id
-        buffer[:, 2:] = sampled
-
         return buffer
 
     def _sample(self, size):
-        idx = np.random.randint(self.n, size=size)
+        idx = self.rng.integers(self.n, size=size)
         sampled = self.locations[idx]
-        i_mask = sampled[:, 0] == 0
-        x_mask = sampled[:, 0] == 1
-
-        for mask, shape in zip([i_mask, x_mask], [self.crop_shape, self.crop_shape_t]):
-            high = np.floor(shape * 0.4)
-            low = -high
-            low[shape == 1] = 0
-            high[shape == 1] = 1
-
-            shift = np.random.randint(low=low, high=high, size=(mask.sum(), 3), dtype=np.int32)
-            sampled[mask, 1:4] += shift
-            sampled[mask, 4:] += shift
 
-            sampled[mask, 1:4] = np.clip(sampled[mask, 1:4], 0, self.field.shape - shape)
-            sampled[mask, 4:7] = np.clip(sampled[mask, 4:7], 0 + shape, self.field.shape)
+        # Shift ranges and crop shapes for each orientation, gathered for each of the locations
+        shapes = np.array([self.crop_shape, self.crop_shape_t])
+        high = np.floor(shapes * 0.4).astype(np.int32)
+        low = -high
+        low[shapes == 1] = 0
+        high[shapes == 1] = 1
+
+        orientations = sampled[:, 0]
+        shapes, low, width = shapes[orientations], low[orientations], (high - low)[orientations]
+
+        # Scale uniform values to the range of each axis instead of drawing bounded integers column by column
+        shift = low + (self.rng.random((size, 3)) * width).astype(np.int32)
+
+        # Shift and clip all the locations at once: starts and stops are views into `sampled`
+        starts, stops = sampled[:, 1:4], sampled[:, 4:7]
+        starts += shift
+        stops += shift
+        np.clip(starts, 0, self.field.shape - shapes, out=starts)
+        np.clip(stops, shapes, self.field.shape, out=stops)
         return sampled
 
     def __repr__(self):
@@ -498,7 +580,7 @@ class SyntheticSampler(Sampler):
     As every synthetically generated crop is completely valid from a sampling point of view,
     we just return placeholder random locations of the desired `crop_shape`.
     """
-    def __init__(self, field, crop_shape, field_id=None, label_id=None, **kwargs):
+    def __init__(self, field, crop_shape, field_id=None, label_id=None, rng=None, **kwargs):
         self.field = field
         self.crop_shape = crop_shape
         self.field_id = field_id
@@ -508,6 +590,7 @@ class SyntheticSampler(Sampler):
         self.n = self._n ** 3
 
         self.name = self.short_name = field.name
+        self.rng = make_rng(rng)
         super().__init__()
 
     def sample(self, size):
@@ -517,18 +600,17 @@ class SyntheticSampler(Sampler):
         buffer[:, 1] = self.label_id
         buffer[:, 2] = 0
 
-        start_point = np.random.randint(low=(0, 0, 0), high=(self._n, self._n, self._n),
-                                        size=(size, 3), dtype=np.int32)
-        end_point = start_point + self.crop_shape
-        buffer[:, [3, 4, 5]] = start_point
-        buffer[:, [6, 7, 8]] = end_point
+        # Contiguous column ranges are assigned as views, without fancy indexing
+        buffer[:, 3:6] = self.rng.integers(low=0, high=self._n, size=(size, 3), dtype=np.int32)
+        buffer[:, 6:9] = buffer[:, 3:6]
+        buffer[:, 6:9] += self.crop_shape
         return buffer
 
 
 class WellSampler(Sampler):
     """ !!. """
     def __init__(self, well, crop_shape, log='AI', field_id=None, label_id=None, threshold=0.0,
-                 spatial_randomization=(0.0, 1.0), depth_randomization=(0.0, 0.0), **kwargs):
+                 spatial_randomization=(0.0, 1.0), depth_randomization=(0.0, 0.0), rng=None, **kwargs):
         self.well = well
         self.crop_shape = crop_shape
         self.log = log
@@ -538,6 +620,7 @@ class WellSampler(Sampler):
 
         self.name = self.short_name = well.name
         self.field = well.field
+        self.rng = make_rng(rng)
         super().__init__()
         self.locations = self._make_locations(well, crop_shape=crop_shape, log=log,
                                               spatial_randomization=spatial_randomization,
@@ -613,8 +696,9 @@ class WellSampler(Sampler):
                                                                      log=self.log) >= self.threshold
                                       for location in sampled], dtype=np.bool_)
 
-                sampled_list.append(sampled[condition])
-                accumulated += condition.sum()
+                accepted = sampled[condition]
+                sampled_list.append(accepted)
+                accumulated += len(accepted)
             sampled = np.concatenate(sampled_list)[:size]
 
         buffer = np.empty((size, 9), dtype=np.int32)
@@ -624,21 +708,57 @@ class WellSampler(Sampler):
         return buffer
 
     def _sample(self, size):
-        idx = np.random.randint(self.n, size=size)
+        idx = self.rng.integers(self.n, size=size)
         sampled = self.locations[idx] # (orientation, i_start, x_start, d_start, i_stop, x_stop, d_stop)
 
-        depths = np.random.randint(*self.ranges[-1], size=size, dtype=np.int32)
+        depths = self.rng.integers(*self.ranges[-1], size=size, dtype=np.int32)
         sampled[:, 3] = depths
         sampled[:, 6] = depths + self.crop_shape[-1]
         return sampled
 
 
-@njit
+@njit(parallel=True)
+def make_start_points_masks(points, ranges, crop_shape, crop_shape_t):
+    """ Compute, whether each of the points can be a starting point for a crop of i- and x-oriented shape.
+    Both masks are made in one pass over `points`.
+
+    Parameters
+    ----------
+    points : np.ndarray
+        Points with (i_start, x_start) as the first two columns.
+    ranges : np.ndarray
+        Array of (3, 2) shape with allowed ranges of locations along each axis.
+    crop_shape, crop_shape_t : np.ndarray
+        Shapes of i- and x-oriented crops.
+
+    Returns
+    -------
+    i_mask, x_mask : np.ndarray
+        Boolean masks of points for i- and x-oriented crops.
+    """
+    i_mask = np.empty(len(points), dtype=np.bool_)
+    x_mask = np.empty(len(points), dtype=np.bool_)
+
+    for n in prange(len(points)): #pylint: disable=not-an-iterable
+        point_i, point_x = points[n, 0], points[n, 1]
+        inside = (ranges[0, 0] <= point_i) and (ranges[1, 0] <= point_x)
+
+        i_mask[n] = (inside and (point_i + crop_shape[0] <= ranges[0, 1])
+                            and (point_x + crop_shape[1] <= ranges[1, 1]))
+        x_mask[n] = (inside and (point_i + crop_shape_t[0] <= ranges[0, 1])
+                            and (point_x + crop_shape_t[1] <= ranges[1, 1]))
+    return i_mask, x_mask
+
+@njit(parallel=True)
 def spatial_check_points(points, matrix, crop_shape, i_mask, x_mask, threshold):
     """ Compute points, which would generate crops with more than `threshold` labeled pixels.
     For each point, we test two possible shapes (i-oriented and x-oriented) and check `matrix` to compute the
     number of present points. Therefore, each of the initial points can result in up to two points in the output.
 
+    Number and sum of present values in each crop are computed in constant time from summed-area tables.
+    Points are checked in parallel, and then the passed ones are gathered, grouped by orientation:
+    i-oriented crops go first, each group keeping the original order of points.
+
     Used as one of the filters for points creation at sampler initialization.
 
     Parameters
@@ -657,43 +777,98 @@ def spatial_check_points(points, matrix, crop_shape, i_mask, x_mask, threshold):
         Minimum amount of points in a generated crop.
     """
     shape_i, shape_x = crop_shape
+    counts_table, sums_table = make_summed_area_tables(matrix)
 
-    # Return inline, crossline, corrected_depth (mean across crop), and 0/1 as i/x flag
-    buffer = np.empty((2 * len(points), 4), dtype=np.int32)
-    counter = 0
+    # For each point and orientation, whether the crop passes the check and its mean depth
+    passed = np.zeros((len(points), 2), dtype=np.bool_)
+    depths = np.empty((len(points), 2), dtype=np.int32)
 
-    for (point_i, point_x, _), i_mask_, x_mask_ in zip(points, i_mask, x_mask):
-        if i_mask_:
-            sliced = matrix[point_i:point_i+shape_i, point_x:point_x+shape_x]
-            present_points, running_sum = np.int32(0), np.int32(0)
+    for n in prange(len(points)): #pylint: disable=not-an-iterable
+        point_i, point_x = points[n, 0], points[n, 1]
 
-            for value in np.nditer(sliced):
-                if value > 0:
-                    present_points += 1
-                    running_sum += value.item()
+        for orientation in range(2):
+            if orientation == 0:
+                mask_, size_i, size_x = i_mask[n], shape_i, shape_x
+            else:
+                mask_, size_i, size_x = x_mask[n], shape_x, shape_i
 
-            if present_points >= threshold:
-                d_mean = round(running_sum / present_points)
-                buffer[counter, :] = point_i, point_x, np.int32(d_mean), np.int32(0)
-                counter += 1
+            if mask_:
+                i_stop = min(point_i + size_i, matrix.shape[0])
+                x_stop = min(point_x + size_x, matrix.shape[1])
 
-        if x_mask_:
-            sliced = matrix[point_i:point_i+shape_x, point_x:point_x+shape_i]
-            present_points, running_sum = np.int32(0), np.int32(0)
+                present_points = (counts_table[i_stop, x_stop] - counts_table[point_i, x_stop]
+                                  - counts_table[i_stop, point_x] + counts_table[point_i, point_x])
 
-            for value in np.nditer(sliced):
-                if value > 0:
-                    present_points += 1
-                    running_sum += value.item()
+                if present_points >= threshold:
+                    running_sum = (sums_table[i_stop, x_stop] - sums_table[point_i, x_stop]
+                                   - sums_table[i_stop, point_x] + sums_table[point_i, point_x])
+                    passed[n, orientation] = True
+                    depths[n, orientation] = round(running_sum / present_points)
 
-            if present_points >= threshold:
-                d_mean = round(running_sum / present_points)
-                buffer[counter, :] = point_i, point_x, np.int32(d_mean), np.int32(1)
+    # Return inline, crossline, corrected_depth (mean across crop), and 0/1 as i/x flag
+    buffer = np.empty((passed.sum(), 4), dtype=np.int32)
+    counter = 0
+    for orientation in range(2):
+        for n in range(len(points)):
+            if passed[n, orientation]:
+                buffer[counter, 0] = points[n, 0]
+                buffer[counter, 1] = points[n, 1]
+                buffer[counter, 2] = depths[n, orientation]
+                buffer[counter, 3] = orientation
                 counter += 1
+    return buffer
 
-    return buffer[:counter]
+@njit
+def make_summed_area_tables(matrix):
+    """ Compute tables of the number and sum of positive values of `matrix` in each of its top-left rectangles.
+    Tables are padded with zeros at the start of each axis: sum over `matrix[i:i_stop, x:x_stop]` is
+    `table[i_stop, x_stop] - table[i, x_stop] - table[i_stop, x] + table[i, x]`.
+    """
+    counts_table = np.zeros((matrix.shape[0] + 1, matrix.shape[1] + 1), dtype=np.int64)
+    sums_table = np.zeros((matrix.shape[0] + 1, matrix.shape[1] + 1), dtype=np.float64)
+
+    for i in range(matrix.shape[0]):
+        row_count, row_sum = 0, 0.0
+        for x in range(matrix.shape[1]):
+            value = matrix[i, x]
+            if value > 0:
+                row_count += 1
+                row_sum += value
+            counts_table[i + 1, x + 1] = counts_table[i, x + 1] + row_count
+            sums_table[i + 1, x + 1] = sums_table[i, x + 1] + row_sum
+    return counts_table, sums_table
 
 @njit
+def shift_sampled_locations(locations, idx, depth_shift, i_shift, x_shift, start_bounds, stop_bounds):
+    """ Gather `locations` at `idx`, shift them along each of the axes and clip to bounds in one pass.
+    Shifts can be None: as the kernel is compiled separately for each combination of argument types,
+    this removes the unused branches altogether, specializing the kernel to the sampler configuration.
+    `start_bounds` and `stop_bounds` are (3, 2) arrays with minimum and maximum values for each axis:
+    spatial ones are applied only to shifted axes.
+    """
+    sampled = np.empty((len(idx), locations.shape[1]), dtype=locations.dtype)
+
+    for i in range(len(idx)):
+        location_idx = idx[i]
+        for column in range(locations.shape[1]):
+            sampled[i, column] = locations[location_idx, column]
+
+        if i_shift is not None:
+            sampled[i, 1] = min(max(sampled[i, 1] + i_shift[i], start_bounds[0, 0]), start_bounds[0, 1])
+            sampled[i, 4] = min(max(sampled[i, 4] + i_shift[i], stop_bounds[0, 0]), stop_bounds[0, 1])
+        if x_shift is not None:
+            sampled[i, 2] = min(max(sampled[i, 2] + x_shift[i], start_bounds[1, 0]), start_bounds[1, 1])
+            sampled[i, 5] = min(max(sampled[i, 5] + x_shift[i], stop_bounds[1, 0]), stop_bounds[1, 1])
+        if depth_shift is not None:
+            sampled[i, 3] += depth_shift[i]
+            sampled[i, 6] += depth_shift[i]
+
+        # Depths are clipped even without shifts, as crops at horizon depth can go beyond the field
+        sampled[i, 3] = min(max(sampled[i, 3], start_bounds[2, 0]), start_bounds[2, 1])
+        sampled[i, 6] = min(max(sampled[i, 6], stop_bounds[2, 0]), stop_bounds[2, 1])
+    return sampled
+
+@njit(parallel=True)
 def spatial_check_sampled(locations, matrix, threshold):
     """ Remove points, which correspond to crops with less than `threshold` labeled pixels.
     Used as a final filter for already sampled locations: they can generate crops with
@@ -713,10 +888,11 @@ def spatial_check_sampled(locations, matrix, threshold):
     condition : np.ndarray
         Boolean mask for locations.
     """
-    #pylint: disable=chained-comparison
-    condition = np.ones(len(locations), dtype=np.bool_)
+    #pylint: disable=chained-comparison, not-an-iterable
+    condition = np.zeros(len(locations), dtype=np.bool_)
 
-    for i, (_, i_start, x_start, d_start, i_stop,  x_stop,  d_stop) in enumerate(locations):
+    for i in prange(len(locations)):
+        _, i_start, x_start, d_start, i_stop, x_stop, d_stop = locations[i]
         sliced = matrix[i_start:i_stop, x_start:x_stop]
         valid_points = np.int32(0)
 
@@ -724,9 +900,8 @@ def spatial_check_sampled(locations, matrix, threshold):
             if (d_start < value) and (value < d_stop):
                 valid_points += 1
             if valid_points >= threshold:
+                condition[i] = True
                 break
-        else:
-            condition[i] = False
     return condition
 
 @njit
@@ -740,7 +915,7 @@ def volumetric_check_sampled(locations, points, crop_shape, crop_shape_t, thresh
     locations : np.ndarray
         Locations in (orientation, i_start, x_start, d_start, i_stop, x_stop, d_stop) format.
     points : points
-        Fault points.
+        Fault points, sorted by inlines: only points from the inline range of each location are checked.
     crop_shape : np.ndarray
         Crop shape
     crop_shape_t : np.ndarray
@@ -756,14 +931,35 @@ def volumetric_check_sampled(locations, points, crop_shape, crop_shape_t, thresh
     condition = np.ones(len(locations), dtype=np.bool_)
 
     if threshold > 0:
-        for i, (orientation, i_start, x_start, d_start, i_stop,  x_stop, d_stop) in enumerate(locations):
-            shape = crop_shape if orientation == 0 else crop_shape_t
-            mask_bbox = np.array([[i_start, i_stop], [x_start, x_stop], [d_start, d_stop]], dtype=np.int32)
-            mask = np.zeros((shape[0], shape[1], shape[2]), dtype=np.int32)
+        inlines = np.ascontiguousarray(points[:, 0])
+
+        # The same mask is used for all of the locations: after each check, only the marked pixels are reset
+        max_shape = np.maximum(crop_shape, crop_shape_t)
+        mask = np.zeros((max_shape[0], max_shape[1], max_shape[2]), dtype=np.bool_)
+
+        for i, (_, i_start, x_start, d_start, i_stop, x_stop, d_stop) in enumerate(locations):
+            start = np.searchsorted(inlines, i_start, side='left')
+            stop = np.searchsorted(inlines, i_stop, side='left')
 
-            insert_points_into_mask(mask, points, mask_bbox, 1, 0)
-            if mask.sum() < threshold:
-                condition[i] = False
+            # Count distinct points inside the location, until there are enough of them
+            n_points, n_checked = 0, stop
+            for j in range(start, stop):
+                i_point, x_point, d_point = points[j, 0] - i_start, points[j, 1] - x_start, points[j, 2] - d_start
+                if (x_point >= 0) and (x_point < x_stop - x_start) and (d_point >= 0) and (d_point < d_stop - d_start):
+                    if not mask[i_point, x_point, d_point]:
+                        mask[i_point, x_point, d_point] = True
+                        n_points += 1
+
+                        if n_points >= threshold:
+                            n_checked = j + 1
+                            break
+
+            for j in range(start, n_checked):
+                i_point, x_point, d_point = points[j, 0] - i_start, points[j, 1] - x_start, points[j, 2] - d_start
+                if (x_point >= 0) and (x_point < x_stop - x_start) and (d_point >= 0) and (d_point < d_stop - d_start):
+                    mask[i_point, x_point, d_point] = False
+
+            condition[i] = n_points >= threshold
 
     return condition
 
@@ -795,6 +991,9 @@ class SeismicSampler(Sampler):
         Map of points to remove from potentially generated locations.
     randomize_depth : bool
         Whether to apply random shift to depth locations of sampled horizon points or not.
+    rng : None, int or np.random.Generator
+        Source of randomness for sampling: each of the label samplers gets its own independent generator, spawned
+        from it. If None, then the seed is taken from the global `numpy` random state.
     kwargs : dict
         Other parameters of initializing label samplers.
     """
@@ -823,7 +1022,10 @@ class SeismicSampler(Sampler):
 
 
     def __init__(self, labels, crop_shape, cube_proportions=None, uniform_labels=True,
-                 threshold=0.05, ranges=None, filtering_matrix=None, randomize_depth=True, **kwargs):
+                 threshold=0.05, ranges=None, filtering_matrix=None, randomize_depth=True, rng=None, **kwargs):
+        # Independent streams of randomness for label samplers
+        seed_sequence = np.random.SeedSequence(int(make_rng(rng).integers(2**63)))
+
         # One sampler of each `label` for each `field`
         names, sampler_classes = {}, {}
         samplers = AugmentedDict({field_name: [] for field_name in labels.keys()})
@@ -853,7 +1055,7 @@ class SeismicSampler(Sampler):
                 label_sampler = sampler_class(label, crop_shape=crop_shape_, threshold=threshold_,
                                               ranges=ranges_, filtering_matrix=filtering_matrix_,
                                               field_id=field_id, label_id=label_id, randomize_depth=randomize_depth,
-                                              **kwargs)
+                                              rng=np.random.default_rng(seed_sequence.spawn(1)[0]), **kwargs)
 
                 if label_sampler.n != 0:
                     samplers[field_name].append(label_sampler)
@@ -10,4 +10,5 @@ from .dtype_conversion import *
 from .format_conversion import *
 from .functions import *
 from .groupby import *
+from .quantization import Quantizer, compute_quantiles_of_integers
 from .storage import SQBStorage
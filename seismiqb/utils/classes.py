@@ -293,11 +293,11 @@ class AugmentedDict(OrderedDict):
 
         if not callable(attribute):
             # Attribute or property
-            return AugmentedDict({key_ : getattr(value, key) for key_, value in self.items()})
+            return AugmentedDict((key_, getattr(value, key)) for key_, value in self.items())
 
         @wraps(attribute)
         def method_wrapper(*args, **kwargs):
-            return AugmentedDict({key_ : getattr(value, key)(*args, **kwargs) for key_, value in self.items()})
+            return AugmentedDict((key_, getattr(value, key)(*args, **kwargs)) for key_, value in self.items())
         return method_wrapper
 
     def __dir__(self):
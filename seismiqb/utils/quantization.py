@@ -0,0 +1,167 @@
+""" Quantization of data values. """
+import numpy as np
+from numba import njit, prange
+
+from batchflow import Quantizer as BaseQuantizer
+
+
+
+class Quantizer(BaseQuantizer):
+    """ Quantizer with faster transforms, which rely on bins being uniform.
+    Produces exactly the same results, as :class:`batchflow.Quantizer`.
+    """
+    def __init__(self, ranges, clip=True, center=False, mean=None, dtype=np.int8):
+        super().__init__(ranges=ranges, clip=clip, center=center, mean=mean, dtype=dtype)
+
+        # Bins, padded with infinite edges: element at index `i` is the left edge of bin `i` in terms of `np.digitize`
+        self.padded_bins = np.concatenate([[-np.inf], self.bins, [np.inf]]).astype(np.float32)
+        self.bin_width = (float(self.bins[-1]) - float(self.bins[0])) / (len(self.bins) - 1)
+
+        # Dequantized value for each possible quantized one, indexed by its unsigned representation
+        self.unsigned_dtype = np.dtype(dtype).str.replace('i', 'u')
+        values = np.arange(2 ** (8 * np.dtype(dtype).itemsize)).astype(self.unsigned_dtype).view(dtype)
+        self.lookup_table = super().dequantize(values)
+
+    def quantize(self, array, copy=False):
+        """ Quantize data: find the index of each element in the pre-computed bins and use it as the new value.
+        Converts `array` to `self.dtype`. Lossy.
+
+        As bins are uniform, the index is computed arithmetically and then corrected by comparing with the nearest
+        bin edges, instead of running a binary search for each element.
+        For contiguous float32 arrays, centering, clipping and binning are fused into one parallel pass.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Data to quantize.
+        copy : bool, optional
+            Whether to make copy of the data under the hood, by default False.
+            Enabled copy will not allow to change input data but quantization will be slower.
+        """
+        # Fused single pass over the data for contiguous float arrays
+        if array.dtype == np.float32 and array.flags.c_contiguous and (copy or array.flags.writeable):
+            # Subtract the mean with the same precision, as `numpy` does for in-place subtraction
+            mean = np.result_type(array.dtype, self.mean).type(self.mean) if self.center else np.float32(0)
+            dtype_info = np.iinfo(self.dtype)
+            result = np.empty(array.shape, dtype=self.dtype)
+            quantize_kernel(array.reshape(-1), result.reshape(-1), padded_bins=self.padded_bins,
+                            bin_width=self.bin_width, mean=mean, center=self.center,
+                            lower=float(self.ranges[0]), upper=float(self.ranges[1]), clip=self.clip,
+                            inplace=not copy, offset=dtype_info.min, max_value=dtype_info.max)
+            return result
+
+        if copy:
+            array = array.copy()
+        if self.center:
+            array -= self.mean
+        if self.clip:
+            np.clip(array, *self.ranges, out=array)
+
+        # Estimate index of bin for each element. NaNs are put to the last bin, as in `np.digitize`
+        n_bins = len(self.bins)
+        indices = np.subtract(array, self.bins[0], dtype=np.float32)
+        indices /= self.bin_width
+        np.floor(indices, out=indices)
+        indices += 1
+        np.fmin(indices, n_bins, out=indices)
+        np.fmax(indices, 0, out=indices)
+        indices = indices.astype(np.intp)
+
+        # Fix estimates, which are off by one due to rounding errors near bin edges
+        indices -= array < self.padded_bins[indices]
+        indices += array >= self.padded_bins[indices + 1]
+
+        indices += np.iinfo(self.dtype).min
+        if not self.clip:
+            np.minimum(indices, np.iinfo(self.dtype).max, out=indices) # to put maximum value into bin
+        return indices.astype(self.dtype)
+
+    __call__ = quantize
+
+    def dequantize(self, array, copy=False):
+        """ Dequantize data: use each element as the index in the array of pre-computed bins.
+        Converts `array` to float32 dtype. Unable to recover full information.
+
+        Arrays of `self.dtype` are dequantized with one gather from the table of all possible values.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Data to dequantize.
+        copy : bool, optional
+            Whether to make copy of the data under the hood, by default False.
+            Used only for arrays of other dtypes.
+        """
+        if array.dtype != self.dtype:
+            return super().dequantize(array, copy=copy)
+        return self.lookup_table.take(array.view(self.unsigned_dtype))
+
+
+@njit(parallel=True, cache=True)
+def quantize_kernel(array, result, padded_bins, bin_width, mean, center, lower, upper, clip, inplace,
+                    offset, max_value):
+    """ Quantize flat `array` into `result` in one pass: center, clip and find the bin of each element.
+    Processed values are written back to `array`, if `inplace`, in the same way, as in-place `numpy` operations do.
+    """
+    n_bins = len(padded_bins) - 2
+    first_bin = padded_bins[1]
+
+    for i in prange(len(array)): #pylint: disable=not-an-iterable
+        value = array[i]
+        if center:
+            value = np.float32(value - mean)
+        if clip and value == value:
+            value = np.float32(min(max(np.float64(value), lower), upper))
+        if inplace:
+            array[i] = value
+
+        if value != value:
+            # NaNs are put to the last bin, as in `np.digitize`
+            index = n_bins
+        else:
+            estimate = np.floor((np.float64(value) - first_bin) / bin_width) + 1
+            index = int(min(max(estimate, 0), n_bins))
+
+            # Fix estimates, which are off by one due to rounding errors near bin edges
+            if value < padded_bins[index]:
+                index -= 1
+            elif value >= padded_bins[index + 1]:
+                index += 1
+
+        index += offset
+        if not clip and index > max_value:
+            index = max_value # to put maximum value into bin
+        result[i] = index
+
+
+def compute_quantiles_of_integers(array, q):
+    """ Compute quantiles of 8-bit integer array with linear interpolation, same as `np.quantile` does.
+    As there are only 256 possible values, element counts are used instead of sorting the data.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Array of `int8` or `uint8` dtype.
+    q : sequence of floats
+        Quantiles to compute, in the [0, 1] range.
+    """
+    counts = np.bincount(array.ravel().view(np.uint8), minlength=256)
+    offset = 0
+    if array.dtype == np.int8:
+        # Re-order counts to the ascending order of signed values
+        counts, offset = np.roll(counts, 128), -128
+    cumulative_counts = np.cumsum(counts)
+
+    # Values at neighbouring ranks of each quantile
+    positions = np.asarray(q, dtype=np.float64) * (cumulative_counts[-1] - 1)
+    left_ranks = np.floor(positions).astype(np.int64)
+    right_ranks = np.minimum(left_ranks + 1, cumulative_counts[-1] - 1)
+    left_values = np.searchsorted(cumulative_counts, left_ranks, side='right') + offset
+    right_values = np.searchsorted(cumulative_counts, right_ranks, side='right') + offset
+
+    # Interpolate in the same way, as `numpy` does
+    fractions = positions - left_ranks
+    differences = right_values - left_values
+    return np.where(fractions >= 0.5,
+                    right_values - differences * (1 - fractions),
+                    left_values + differences * fractions)